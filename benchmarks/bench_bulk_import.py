@@ -0,0 +1,100 @@
+"""Rows per second of the bulk book importer, row-by-row vs set-based.
+
+    python -m benchmarks.bench_bulk_import --rows 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from benchmarks.common import GENRES, seed_sqlite
+from src.crud import books
+from src.schemas.book import BookCreate
+
+
+async def row_by_row_import(db: AsyncSession, items):
+    """The previous importer: three statements per item."""
+    results = []
+    for book in items:
+        author = await db.execute(
+            text("SELECT id FROM authors WHERE id = :id"),
+            {"id": book.author_id},
+        )
+        assert author.first()
+        existing = await db.execute(
+            text(
+                "SELECT id, title, genre, published_year, author_id "
+                "FROM books WHERE title = :title AND author_id = :author_id"
+            ),
+            {"title": book.title, "author_id": book.author_id},
+        )
+        row = existing.mappings().first()
+        if row is None:
+            result = await db.execute(
+                text(
+                    "INSERT INTO books "
+                    "(title, genre, published_year, author_id) "
+                    "VALUES (:title, :genre, :published_year, :author_id) "
+                    "RETURNING id, title, genre, published_year, author_id"
+                ),
+                book.model_dump(mode="json"),
+            )
+            row = result.mappings().first()
+        results.append(row)
+    await db.commit()
+    return results
+
+
+def make_items(rows: int, authors: int, duplicate_ratio: float):
+    rnd = random.Random(7)
+    items = [
+        BookCreate(
+            title=f"Imported {i}",
+            genre=rnd.choice(GENRES),
+            published_year=rnd.randint(1800, 2025),
+            author_id=rnd.randint(1, authors),
+        )
+        for i in range(rows)
+    ]
+    duplicates = int(rows * duplicate_ratio)
+    return items + rnd.sample(items, duplicates)
+
+
+async def measure(name, importer, items):
+    path = seed_sqlite(0)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with AsyncSession(engine) as db:
+            start = time.perf_counter()
+            results = await importer(db, items)
+            elapsed = time.perf_counter() - start
+        assert len(results) == len(items)
+        print(
+            f"{name:<12} {len(items):>8} rows {elapsed:>8.2f} s "
+            f"{len(items) / elapsed:>10.0f} rows/s"
+        )
+    finally:
+        await engine.dispose()
+        os.remove(path)
+
+
+async def run(rows: int, duplicate_ratio: float):
+    items = make_items(rows, 1000, duplicate_ratio)
+    await measure("row-by-row", row_by_row_import, items)
+    await measure("set-based", books.bulk_import_books, items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.duplicates))
+
+
+if __name__ == "__main__":
+    main()
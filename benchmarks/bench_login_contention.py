@@ -0,0 +1,137 @@
+"""/books read latency while logins are hammered.
+
+    python -m benchmarks.bench_login_contention --logins 8
+    python -m benchmarks.bench_login_contention --logins 8 --blocking
+
+--blocking verifies passwords inline on the event loop, the way login
+worked before bcrypt was moved to the password executor.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from statistics import median, quantiles
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import seed_sqlite
+from src.core.limiter import limiter
+from src.crud import user as user_crud
+from src.crud.books import book_cache
+from src.db.database import get_db
+from src.main import app
+
+USERS = 8
+PASSWORD = "benchmark-password"
+
+
+async def blocking_verify_and_update(plain_password, hashed_password):
+    return user_crud.pwd_context.verify_and_update(
+        plain_password, hashed_password
+    )
+
+
+async def read_latencies(client, requests: int) -> list[float]:
+    samples = []
+    for i in range(requests):
+        start = time.perf_counter()
+        resp = await client.get(
+            "/books/", params={"limit": 20, "offset": (i * 20) % 2000}
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+        assert resp.status_code == 200, resp.text
+    return samples
+
+
+async def hammer_logins(client, user: int, stop: asyncio.Event) -> int:
+    logins = 0
+    while not stop.is_set():
+        resp = await client.post("/users/login", json={
+            "email": f"bench{user}@example.com", "password": PASSWORD
+        })
+        assert resp.status_code == 200, resp.text
+        logins += 1
+    return logins
+
+
+def summary(label: str, samples: list[float], extra: str = ""):
+    p95 = quantiles(samples, n=20)[-1]
+    print(
+        f"{label:<18} p50 {median(samples):8.2f} ms  "
+        f"p95 {p95:8.2f} ms  max {max(samples):8.2f} ms {extra}"
+    )
+
+
+async def run(rows, requests, logins, blocking):
+    path = seed_sqlite(rows)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    limiter.enabled = False
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # One summary line per request; keep only the slow-query log.
+    logging.getLogger("src.db.instrumentation").setLevel(logging.WARNING)
+    # Measure the database path, not the result cache.
+    book_cache.maxsize = 0
+    if blocking:
+        user_crud.verify_and_update_password = blocking_verify_and_update
+
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for user in range(USERS):
+                await client.post("/users/register", json={
+                    "email": f"bench{user}@example.com",
+                    "password": PASSWORD,
+                })
+
+            mode = "inline" if blocking else "executor"
+            print(
+                f"bcrypt rounds={user_crud.BCRYPT_ROUNDS} "
+                f"workers={user_crud.PASSWORD_HASH_WORKERS} mode={mode}"
+            )
+            summary("idle", await read_latencies(client, requests))
+
+            stop = asyncio.Event()
+            hammers = [
+                asyncio.create_task(hammer_logins(client, i % USERS, stop))
+                for i in range(logins)
+            ]
+            start = time.perf_counter()
+            samples = await read_latencies(client, requests)
+            stop.set()
+            done = sum(await asyncio.gather(*hammers))
+            rate = done / (time.perf_counter() - start)
+            summary(
+                f"{logins} login loops", samples, f"({rate:.1f} logins/s)"
+            )
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        await engine.dispose()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--blocking", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.requests, args.logins, args.blocking))
+
+
+if __name__ == "__main__":
+    main()
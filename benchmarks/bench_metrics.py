@@ -0,0 +1,146 @@
+"""Per-request cost of the Prometheus middleware.
+
+    python -m benchmarks.bench_metrics --requests 5000
+
+Requests are sent straight into the ASGI app (no HTTP client), once
+through the normal middleware stack and once through the same stack
+without MetricsMiddleware, alternating rounds so drift affects both.
+"/" does no I/O and shows the fixed overhead; "/books/" is a cached
+20-row page and "/books/{id}" the last route the middleware has to
+match against.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from statistics import median
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import seed_sqlite
+from src.core.limiter import limiter
+from src.core.metrics import MetricsMiddleware, RouteTemplates
+from src.db.database import get_db, get_read_db
+from src.main import app
+
+ROUNDS = 5
+PATHS = (
+    ("/", b""),
+    ("/books/", b"limit=20"),
+    ("/books/{id}", None),
+)
+
+
+def _scope(path: str, query: bytes) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1234),
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "headers": [(b"host", b"bench")],
+    }
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    if message["type"] == "http.response.start":
+        assert message["status"] == 200, message
+
+
+async def mean_seconds(stack, path, query, requests) -> float:
+    app.middleware_stack = stack
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(_scope(path, query), _receive, _send)
+    return (time.perf_counter() - start) / requests
+
+
+def _stacks():
+    with_metrics = app.build_middleware_stack()
+    saved = list(app.user_middleware)
+    app.user_middleware[:] = [
+        m for m in saved if m.cls is not MetricsMiddleware
+    ]
+    try:
+        without = app.build_middleware_stack()
+    finally:
+        app.user_middleware[:] = saved
+    return with_metrics, without
+
+
+async def run(rows: int, requests: int):
+    path = seed_sqlite(rows)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    limiter.enabled = False
+    logging.getLogger("src.db.instrumentation").setLevel(logging.WARNING)
+    with_metrics, without = _stacks()
+
+    try:
+        route_template = RouteTemplates(app.router)
+        scope = _scope(f"/books/{rows}", b"")
+        start = time.perf_counter()
+        for _ in range(requests):
+            route_template(scope)
+        matching = (time.perf_counter() - start) / requests
+        print(f"{requests} requests x {ROUNDS} rounds per path")
+        print(f"route matching alone: {matching * 1e6:.1f} us")
+        print(f"{'path':<14} {'without':>10} {'with':>10} {'overhead':>10}")
+        for label, query in PATHS:
+            target = f"/books/{rows}" if query is None else label
+            query = query or b""
+            plain, metered = [], []
+            await mean_seconds(with_metrics, target, query, 50)
+            for _ in range(ROUNDS):
+                plain.append(
+                    await mean_seconds(without, target, query, requests)
+                )
+                metered.append(
+                    await mean_seconds(with_metrics, target, query, requests)
+                )
+            base, instrumented = median(plain), median(metered)
+            print(
+                f"{label:<14} {base * 1e6:>8.0f}us"
+                f" {instrumented * 1e6:>8.0f}us"
+                f" {(instrumented - base) * 1e6:>+8.1f}us"
+                f" ({(instrumented / base - 1) * 100:+.1f}%)"
+            )
+    finally:
+        app.middleware_stack = None
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+        await engine.dispose()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare OFFSET and keyset pagination cost at increasing page depth.
+
+    python -m benchmarks.bench_pagination --rows 200000
+"""
+import argparse
+import asyncio
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from benchmarks.common import seed_sqlite, timed
+from src.crud import books
+from src.crud.books import book_cache
+
+PAGE_SIZE = 10
+
+
+async def run(rows: int, pages: list[int], sort_by: str):
+    path = seed_sqlite(rows)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    # Repeated calls must reach the database, not the result cache.
+    book_cache.clear()
+    book_cache.maxsize = 0
+    try:
+        async with AsyncSession(engine) as db:
+            print(f"{rows} rows, sort_by={sort_by}, limit={PAGE_SIZE}")
+            print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+            for page in pages:
+                offset = (page - 1) * PAGE_SIZE
+                after = None
+                if offset:
+                    # The row a client would hold a cursor for after
+                    # walking page - 1 pages.
+                    prev = await books.get_books(
+                        db, limit=1, offset=offset - 1, sort_by=sort_by
+                    )
+                    after = (prev[0][sort_by], prev[0]["id"])
+
+                offset_ms = await timed(lambda: books.get_books(
+                    db, limit=PAGE_SIZE, offset=offset, sort_by=sort_by
+                ))
+                keyset_ms = await timed(lambda: books.get_books(
+                    db, limit=PAGE_SIZE, sort_by=sort_by, after=after
+                ))
+                print(f"{page:>8} {offset_ms:>10.3f} {keyset_ms:>10.3f}")
+    finally:
+        await engine.dispose()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--sort-by", default="id")
+    parser.add_argument(
+        "--pages", type=int, nargs="+", default=[1, 100, 1_000, 10_000]
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.pages, args.sort_by))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Measure read throughput at different connection pool sizes.
+
+    python -m benchmarks.bench_pool --concurrency 50
+    python -m benchmarks.bench_pool --url postgresql+asyncpg://...
+
+Without --url a seeded SQLite file is used; SQLite serialises writers
+but concurrent readers still show the cost of an undersized pool.
+Pool settings not varied here come from the DATABASE_* environment.
+"""
+import argparse
+import asyncio
+import os
+import time
+from dataclasses import replace
+
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from benchmarks.common import seed_sqlite
+from src.core.config import DatabaseSettings
+from src.crud import books
+from src.crud.books import book_cache
+
+
+async def _worker(engine, requests: int, errors: list):
+    for i in range(requests):
+        try:
+            async with AsyncSession(engine) as db:
+                await books.get_books(
+                    db, limit=20, offset=(i * 20) % 2000, sort_by="title"
+                )
+        except PoolTimeout:
+            errors.append(i)
+
+
+async def measure(settings, pool_size, concurrency, requests):
+    settings = replace(
+        settings, pool_size=pool_size, max_overflow=0, pool_timeout=5.0
+    )
+    kwargs = settings.engine_kwargs()
+    if settings.is_sqlite:
+        # aiosqlite defaults to NullPool; force a sized queue pool.
+        kwargs.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=0,
+            pool_timeout=settings.pool_timeout,
+        )
+    engine = create_async_engine(settings.url, **kwargs)
+    errors = []
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(engine, requests, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        await engine.dispose()
+    return concurrency * requests / elapsed, len(errors)
+
+
+async def run(url, rows, pool_sizes, concurrency, requests):
+    path = None
+    if url is None:
+        path = seed_sqlite(rows)
+        url = f"sqlite+aiosqlite:///{path}"
+    settings = replace(DatabaseSettings.from_env(), url_override=url)
+    # Every request must reach the pool, not the result cache.
+    book_cache.clear()
+    book_cache.maxsize = 0
+    try:
+        print(f"{concurrency} concurrent clients x {requests} requests")
+        print(f"{'pool_size':>10} {'req/s':>10} {'timeouts':>9}")
+        for pool_size in pool_sizes:
+            rate, timeouts = await measure(
+                settings, pool_size, concurrency, requests
+            )
+            print(f"{pool_size:>10} {rate:>10.0f} {timeouts:>9}")
+    finally:
+        if path:
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument(
+        "--pool-sizes", type=int, nargs="+", default=[1, 5, 10, 20, 50]
+    )
+    args = parser.parse_args()
+    asyncio.run(run(
+        args.url, args.rows, args.pool_sizes, args.concurrency, args.requests
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Per-request cost of the rate limiter for each storage backend.
+
+    python -m benchmarks.bench_rate_limit --hits 20000
+    python -m benchmarks.bench_rate_limit --redis redis://localhost:6379
+
+Measures limiter.hit() for one client key, as slowapi calls it on every
+request to a limited route.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+
+# Registers the sqlite:// scheme.
+from src.core import rate_limit_storage  # noqa: F401
+
+
+def per_hit_us(uri: str, strategy: str, hits: int) -> float:
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse(f"{hits * 2}/hour")
+    limiter.hit(item, "warmup")
+    start = time.perf_counter()
+    for _ in range(hits):
+        limiter.hit(item, "127.0.0.1", "/books/")
+    return (time.perf_counter() - start) / hits * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hits", type=int, default=20_000)
+    parser.add_argument("--redis", default=None)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="rate_limits_")
+    os.close(fd)
+    backends = [("memory://", "memory://"), (f"sqlite:///{path}", "sqlite")]
+    if args.redis:
+        backends.append((args.redis, "redis"))
+
+    try:
+        print(f"{args.hits} hits per backend")
+        print(f"{'storage':<10} {'strategy':<24} {'us/hit':>8}")
+        for uri, label in backends:
+            for strategy in ("fixed-window", "sliding-window-counter"):
+                cost = per_hit_us(uri, strategy, args.hits)
+                print(f"{label:<10} {strategy:<24} {cost:>8.2f}")
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Requests/sec of 100-row /books pages by serialization path.
+
+    python -m benchmarks.bench_serialization --requests 2000
+
+The first three routes share one signature and serve the same cached
+page, so they differ only in validation and JSON encoding:
+- response_model: FastAPI validates each row into BookOut, then runs
+  jsonable_encoder and the stdlib json encoder (the previous behaviour).
+- TypeAdapter: one list[BookOut] validation, encoded with orjson.
+- projection: trusted rows projected onto BookOut, encoded with orjson
+  (what /books/ does).
+/books/ is the real route, including query parsing, ETag and cursor.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import List
+
+import orjson
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
+from httpx import ASGITransport, AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import seed_sqlite
+from src.core.limiter import limiter
+from src.crud import books
+from src.db.database import get_db, get_read_db
+from src.main import app
+from src.routes.books import _book_payload
+from src.schemas.book import BookOut
+
+PAGE_SIZE = 100
+BOOK_LIST = TypeAdapter(list[BookOut])
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/response-model", response_model=List[BookOut])
+async def response_model_path(
+    limit: int = PAGE_SIZE, db: AsyncSession = Depends(get_db)
+):
+    return await books.get_books(db, limit=limit)
+
+
+@legacy_app.get("/type-adapter")
+async def type_adapter_path(
+    limit: int = PAGE_SIZE, db: AsyncSession = Depends(get_db)
+):
+    rows = await books.get_books(db, limit=limit)
+    return ORJSONResponse(
+        BOOK_LIST.dump_python(BOOK_LIST.validate_python(rows), mode="json")
+    )
+
+
+@legacy_app.get("/projection")
+async def projection_path(
+    limit: int = PAGE_SIZE, db: AsyncSession = Depends(get_db)
+):
+    rows = await books.get_books(db, limit=limit)
+    return ORJSONResponse(_book_payload(rows))
+
+
+async def requests_per_second(target, path: str, requests: int) -> float:
+    async with AsyncClient(
+        transport=ASGITransport(app=target), base_url="http://bench"
+    ) as client:
+        first = await client.get(path, params={"limit": PAGE_SIZE})
+        assert first.status_code == 200, first.text
+        assert len(orjson.loads(first.content)) == PAGE_SIZE
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path, params={"limit": PAGE_SIZE})
+        return requests / (time.perf_counter() - start)
+
+
+async def run(rows: int, requests: int):
+    path = seed_sqlite(rows)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    for target in (app, legacy_app):
+        target.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    limiter.enabled = False
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # One summary line per request; keep only the slow-query log.
+    logging.getLogger("src.db.instrumentation").setLevel(logging.WARNING)
+
+    try:
+        print(f"{requests} requests, {PAGE_SIZE} books per page")
+        for label, target, route in (
+            ("response_model", legacy_app, "/response-model"),
+            ("TypeAdapter", legacy_app, "/type-adapter"),
+            ("projection", legacy_app, "/projection"),
+            ("/books/", app, "/books/"),
+        ):
+            rate = await requests_per_second(target, route, requests)
+            print(f"{label:<16} {rate:>8.0f} req/s")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+        legacy_app.dependency_overrides.pop(get_db, None)
+        await engine.dispose()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.requests))
+
+
+if __name__ == "__main__":
+    main()
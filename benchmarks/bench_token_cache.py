@@ -0,0 +1,60 @@
+"""Per-request cost of get_current_user with and without the token cache.
+
+Both runs include the revocation check, which reads an in-memory SQLite
+database only when its sync interval has passed.
+
+    python -m benchmarks.bench_token_cache --calls 20000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.auth import jwt_handler
+from src.auth.dependencies import get_current_user
+from src.db.models import RevokedToken
+
+
+async def per_call_us(token: str, db: AsyncSession, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await get_current_user(token, db)
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+async def run(calls: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(RevokedToken.__table__.create)
+    async with AsyncSession(engine) as db:
+        await measure(calls, db)
+    await engine.dispose()
+
+
+async def measure(calls: int, db: AsyncSession):
+    token = jwt_handler.create_access_token({"sub": "bench@example.com"})
+    maxsize = jwt_handler.token_cache.maxsize
+
+    jwt_handler.clear_token_cache()
+    jwt_handler.token_cache.maxsize = 0
+    uncached = await per_call_us(token, db, calls)
+
+    jwt_handler.token_cache.maxsize = maxsize
+    cached = await per_call_us(token, db, calls)
+
+    print(f"{calls} calls to get_current_user")
+    print(f"{'verify every time':<20} {uncached:8.2f} us/call")
+    print(f"{'token cache':<20} {cached:8.2f} us/call")
+    print(f"{'speedup':<20} {uncached / cached:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
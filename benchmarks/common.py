@@ -0,0 +1,104 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from statistics import median
+
+from sqlalchemy import create_engine, insert
+
+from src.crud.book_stats import REBUILD_STATEMENTS, rebuild_book_stats
+from src.db.models import Base
+
+GENRES = ["Fiction", "Non-Fiction", "Science", "History"]
+
+
+def seed_sqlite(rows: int, authors: int = 1000, path: str | None = None):
+    """Create a throwaway SQLite database with `rows` random books."""
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="books_bench_")
+        os.close(fd)
+
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.drop_all(sync_engine)
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO authors (id, name, name_lower) VALUES (?, ?, ?)",
+        ((i, f"Author {i}", f"author {i}") for i in range(1, authors + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO books (title, genre, published_year, author_id) "
+        "VALUES (?, ?, ?, ?)",
+        (
+            (
+                f"Book {rnd.randrange(rows * 10):08d}-{i}",
+                rnd.choice(GENRES),
+                rnd.randint(1800, 2025),
+                rnd.randint(1, authors),
+            )
+            for i in range(rows)
+        ),
+    )
+    for statement in REBUILD_STATEMENTS:
+        conn.execute(statement)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return path
+
+
+def reset_schema(engine) -> None:
+    """Drop and recreate every table; all existing data is lost."""
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def seed_database(url: str, rows: int, authors: int = 1000):
+    """Recreate the schema at a sync SQLAlchemy `url` and seed it."""
+    rnd = random.Random(42)
+    engine = create_engine(url)
+    try:
+        reset_schema(engine)
+        authors_table = Base.metadata.tables["authors"]
+        books_table = Base.metadata.tables["books"]
+        with engine.begin() as conn:
+            conn.execute(insert(authors_table), [
+                {"id": i, "name": f"Author {i}"}
+                for i in range(1, authors + 1)
+            ])
+            for start in range(0, rows, 10_000):
+                conn.execute(insert(books_table), [
+                    {
+                        "title": f"Book {rnd.randrange(rows * 10):08d}-{i}",
+                        "genre": rnd.choice(GENRES),
+                        "published_year": rnd.randint(1800, 2025),
+                        "author_id": rnd.randint(1, authors),
+                    }
+                    for i in range(start, min(start + 10_000, rows))
+                ])
+            if engine.dialect.name == "postgresql":
+                conn.exec_driver_sql(
+                    "SELECT setval('authors_id_seq', "
+                    "(SELECT max(id) FROM authors))"
+                )
+            rebuild_book_stats(conn)
+            conn.exec_driver_sql("ANALYZE")
+    finally:
+        engine.dispose()
+
+
+async def timed(coro_factory, repeat: int = 20) -> float:
+    """Median wall time of `coro_factory()` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - start) * 1000)
+    return median(samples)
@@ -0,0 +1,90 @@
+"""add title search indexes
+
+Revision ID: 3f1c2a7d9b84
+Revises: 97d909a90bb9
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b84'
+down_revision: Union[str, None] = '97d909a90bb9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_SEARCH_TABLES = {
+    'books_trgm': 'trigram',
+    'books_fts': 'porter unicode61',
+}
+
+
+def sqlite_search_ddl(table: str, tokenizer: str) -> list[str]:
+    return [
+        f"CREATE VIRTUAL TABLE {table} USING fts5("
+        f"title, content='books', content_rowid='id', "
+        f"tokenize='{tokenizer}')",
+        f"CREATE TRIGGER {table}_ai AFTER INSERT ON books BEGIN "
+        f"INSERT INTO {table}(rowid, title) VALUES (new.id, new.title); END",
+        f"CREATE TRIGGER {table}_ad AFTER DELETE ON books BEGIN "
+        f"INSERT INTO {table}({table}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); END",
+        f"CREATE TRIGGER {table}_au AFTER UPDATE OF title ON books BEGIN "
+        f"INSERT INTO {table}({table}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); "
+        f"INSERT INTO {table}(rowid, title) VALUES (new.id, new.title); END",
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # CONCURRENTLY keeps books writable during the build but cannot
+        # run inside a transaction. A failed build leaves an INVALID
+        # index behind; drop it before running the migration again.
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_books_title_trgm', 'books', ['title'], unique=False,
+                postgresql_using='gin',
+                postgresql_ops={'title': 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+            op.create_index(
+                'ix_books_title_tsv', 'books',
+                [sa.text("to_tsvector('english', title)")], unique=False,
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+            )
+    elif dialect == 'sqlite':
+        for table, tokenizer in SQLITE_SEARCH_TABLES.items():
+            for statement in sqlite_search_ddl(table, tokenizer):
+                op.execute(statement)
+            op.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_books_title_tsv', table_name='books',
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                'ix_books_title_trgm', table_name='books',
+                postgresql_concurrently=True,
+            )
+    elif dialect == 'sqlite':
+        for table in SQLITE_SEARCH_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {table}')
@@ -0,0 +1,56 @@
+"""add books title author unique
+
+Revision ID: 5b7e0c94d2a3
+Revises: c81d5f2e6a09
+Create Date: 2026-10-18 12:31:52.771650
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e0c94d2a3'
+down_revision: Union[str, None] = 'c81d5f2e6a09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # --sql has no database to check; the index build itself then fails
+    # on duplicates.
+    if not context.is_offline_mode():
+        duplicates = op.get_bind().execute(sa.text(
+            'SELECT COUNT(*) FROM ('
+            'SELECT 1 FROM books GROUP BY title, author_id '
+            'HAVING COUNT(*) > 1'
+            ') AS dup'
+        )).scalar()
+        if duplicates:
+            raise RuntimeError(
+                f'{duplicates} (title, author_id) pairs occur more than once '
+                'in books; remove the duplicates before applying this '
+                'migration.'
+            )
+
+    # CONCURRENTLY keeps books writable during the build but cannot run
+    # inside a transaction. A failed build (e.g. a duplicate inserted
+    # after the check above) leaves an INVALID index behind; drop it
+    # before running the migration again.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_books_title_author_id', 'books', ['title', 'author_id'],
+            unique=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_books_title_author_id', table_name='books',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,56 @@
+"""add book facet summaries
+
+Revision ID: 7d3b1e5a9c20
+Revises: e2a9f6b8c417
+Create Date: 2026-10-18 16:05:37.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3b1e5a9c20'
+down_revision: Union[str, None] = 'e2a9f6b8c417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'book_genre_year_counts',
+        sa.Column('genre', sa.String(), nullable=False),
+        sa.Column('published_year', sa.Integer(), nullable=False),
+        sa.Column('book_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('genre', 'published_year'),
+    )
+    op.create_table(
+        'author_genre_counts',
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('genre', sa.String(), nullable=False),
+        sa.Column('book_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('author_id', 'genre'),
+    )
+
+    # Backfill from the existing books; from here on the application
+    # keeps both tables up to date on every book write.
+    op.execute(
+        'INSERT INTO book_genre_year_counts '
+        '(genre, published_year, book_count) '
+        'SELECT genre, published_year, COUNT(*) FROM books '
+        'GROUP BY genre, published_year'
+    )
+    op.execute(
+        'INSERT INTO author_genre_counts (author_id, genre, book_count) '
+        'SELECT author_id, genre, COUNT(*) FROM books '
+        'WHERE author_id IS NOT NULL GROUP BY author_id, genre'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('author_genre_counts')
+    op.drop_table('book_genre_year_counts')
@@ -0,0 +1,45 @@
+"""add revoked tokens revoked at
+
+Revision ID: 8e4d2b7f1c59
+Revises: 4c2f8e1a7b36
+Create Date: 2026-10-18 21:06:37.114902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4d2b7f1c59'
+down_revision: Union[str, None] = '4c2f8e1a7b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows count as revoked at the epoch, so the first sync of
+    # every worker still reads them.
+    op.add_column(
+        'revoked_tokens',
+        sa.Column(
+            'revoked_at', sa.Integer(), nullable=False, server_default='0'
+        ),
+    )
+    op.create_index(
+        op.f('ix_revoked_tokens_revoked_at'),
+        'revoked_tokens',
+        ['revoked_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f('ix_revoked_tokens_revoked_at'), table_name='revoked_tokens'
+    )
+    with op.batch_alter_table('revoked_tokens') as batch_op:
+        batch_op.drop_column('revoked_at')
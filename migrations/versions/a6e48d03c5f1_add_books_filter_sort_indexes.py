@@ -0,0 +1,79 @@
+"""add books filter and sort indexes
+
+Revision ID: a6e48d03c5f1
+Revises: 3f1c2a7d9b84
+Create Date: 2026-10-18 11:02:17.530961
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e48d03c5f1'
+down_revision: Union[str, None] = '3f1c2a7d9b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY builds without blocking writes to books, but cannot
+    # run inside a transaction. If a build fails it leaves an INVALID
+    # index behind; drop it before running the migration again.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_title_id', 'books', ['title', 'id'], unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_published_year_id', 'books', ['published_year', 'id'],
+            unique=False,
+            postgresql_include=['title', 'genre', 'author_id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_author_id_id', 'books', ['author_id', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_genre_id', 'books', ['genre', 'id'], unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_genre_title_id', 'books', ['genre', 'title', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_genre_published_year_id', 'books',
+            ['genre', 'published_year', 'id'], unique=False,
+            postgresql_include=['title', 'author_id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_genre_author_id_id', 'books',
+            ['genre', 'author_id', 'id'], unique=False,
+            postgresql_concurrently=True,
+        )
+    op.execute('ANALYZE books')
+
+
+INDEXES = (
+    'ix_books_genre_author_id_id',
+    'ix_books_genre_published_year_id',
+    'ix_books_genre_title_id',
+    'ix_books_genre_id',
+    'ix_books_author_id_id',
+    'ix_books_published_year_id',
+    'ix_books_title_id',
+)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(
+                name, table_name='books', postgresql_concurrently=True
+            )
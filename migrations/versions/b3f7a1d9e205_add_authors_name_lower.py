@@ -0,0 +1,95 @@
+"""add authors name lower
+
+Revision ID: b3f7a1d9e205
+Revises: 8e4d2b7f1c59
+Create Date: 2026-10-18 22:14:05.382617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f7a1d9e205'
+down_revision: Union[str, None] = '8e4d2b7f1c59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+authors = sa.table(
+    'authors',
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('name_lower', sa.String),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    op.add_column('authors', sa.Column('name_lower', sa.String()))
+
+    if dialect == 'postgresql':
+        # lower() folds all of Unicode here, as str.lower() does.
+        op.execute('UPDATE authors SET name_lower = lower(name)')
+        # Built without blocking writes to authors; see a6e48d03c5f1.
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_authors_name_lower_prefix', 'authors',
+                [sa.text('name_lower text_pattern_ops')], unique=False,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                'ix_authors_name_lower_pattern', table_name='authors',
+                postgresql_concurrently=True,
+            )
+        return
+
+    # Other databases' lower() may only fold ASCII, so the names are
+    # lowercased here, the same way the app does on insert.
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(authors.c.id, authors.c.name)).all()
+    if rows:
+        bind.execute(
+            authors.update()
+            .where(authors.c.id == sa.bindparam('author_id'))
+            .values(name_lower=sa.bindparam('lowered')),
+            [{'author_id': id_, 'lowered': name.lower()}
+             for id_, name in rows],
+        )
+    if dialect == 'sqlite':
+        op.drop_index('ix_authors_name_lower', table_name='authors')
+        op.create_index(
+            'ix_authors_name_lower', 'authors', ['name_lower'], unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_authors_name_lower_pattern', 'authors',
+                [sa.text('lower(name) text_pattern_ops')], unique=False,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                'ix_authors_name_lower_prefix', table_name='authors',
+                postgresql_concurrently=True,
+            )
+    elif dialect == 'sqlite':
+        op.drop_index('ix_authors_name_lower', table_name='authors')
+
+    # On SQLite this copies the table, which would lose an expression
+    # index, so lower(name) is indexed again only afterwards.
+    with op.batch_alter_table('authors') as batch_op:
+        batch_op.drop_column('name_lower')
+
+    if dialect == 'sqlite':
+        op.create_index(
+            'ix_authors_name_lower', 'authors',
+            [sa.text('lower(name)')], unique=False,
+        )
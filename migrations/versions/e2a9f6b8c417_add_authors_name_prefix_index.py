@@ -0,0 +1,51 @@
+"""add authors name prefix index
+
+Revision ID: e2a9f6b8c417
+Revises: 5b7e0c94d2a3
+Create Date: 2026-10-18 13:20:44.612387
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9f6b8c417'
+down_revision: Union[str, None] = '5b7e0c94d2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Built without blocking writes to authors; see a6e48d03c5f1.
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_authors_name_lower_pattern', 'authors',
+                [sa.text('lower(name) text_pattern_ops')], unique=False,
+                postgresql_concurrently=True,
+            )
+    elif dialect == 'sqlite':
+        op.create_index(
+            'ix_authors_name_lower', 'authors',
+            [sa.text('lower(name)')], unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_authors_name_lower_pattern', table_name='authors',
+                postgresql_concurrently=True,
+            )
+    elif dialect == 'sqlite':
+        op.drop_index('ix_authors_name_lower', table_name='authors')
@@ -1,12 +1,19 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.jwt_handler import decode_token
+from src.crud.tokens import ensure_not_revoked
+from src.db.database import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+):
     payload = decode_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    await ensure_not_revoked(db, token, payload)
     return payload
@@ -1,15 +1,27 @@
 from datetime import datetime, timedelta, UTC
+import hashlib
 import os
+import time
+import uuid
 import dotenv
 from jose import JWTError, jwt
 from fastapi import HTTPException
 
+from src.core.cache import InMemoryLRUCache
+
 dotenv.load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", 10000))
+
+# Verified payloads keyed by a hash of the token, each expiring at the
+# token's own `exp`, so a cached token is never accepted past its life.
+# The cache is per process; revocations live in the database (see
+# crud.tokens), so a cached payload says nothing about them.
+token_cache = InMemoryLRUCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=None)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -17,25 +29,72 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     expire = datetime.now(UTC) + (
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(UTC) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "scope": "refresh_token"})
+    to_encode.update({
+        "exp": expire,
+        "scope": "refresh_token",
+        "jti": uuid.uuid4().hex,
+    })
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_token(token: str, refresh: bool = False):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if refresh and payload.get("scope") != "refresh_token":
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _seconds_left(payload: dict) -> float | None:
+    exp = payload.get("exp")
+    return exp - time.time() if exp is not None else None
+
+
+def token_id(token: str, payload: dict) -> str:
+    # Tokens issued before they carried a jti are known by their hash.
+    return payload.get("jti") or _token_key(token)
+
+
+def _verify(token: str) -> dict:
+    key = _token_key(token)
+    payload = token_cache.get(key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
             raise HTTPException(
-                status_code=401,
-                detail="Invalid refresh token"
+                status_code=401, detail="Invalid or expired token"
             )
-        return payload
+        ttl = _seconds_left(payload)
+        if ttl is None or ttl > 0:
+            token_cache.set(key, payload, ttl=ttl)
+    return dict(payload)
+
+
+def decode_token(token: str, refresh: bool = False):
+    payload = _verify(token)
+    if refresh and payload.get("scope") != "refresh_token":
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid refresh token"
+        )
+    return payload
+
+
+def token_claims(token: str) -> dict | None:
+    """Payload of a valid, unexpired token, otherwise None."""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+        return None
+
+
+def forget_token(token: str) -> None:
+    token_cache.delete(_token_key(token))
+
+
+def clear_token_cache() -> None:
+    token_cache.clear()
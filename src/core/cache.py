@@ -0,0 +1,193 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Caches live in each worker process. A write invalidates entries only
+# in the worker that handled it; the others keep serving (and answering
+# If-None-Match for) the old rows until CACHE_TTL_SECONDS runs out. Keep
+# the TTL as short as that staleness allows, or use "none".
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", 1024))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 60))
+
+
+class CacheBackend(ABC):
+    """Key/value store for cached query results.
+
+    `get` returns None on a miss, so None itself is never cached.
+    Namespace versions are kept apart from the cached entries so that
+    eviction can never roll a version back and resurrect stale data.
+    `observer`, when set, is called with "hit", "miss", "eviction" or
+    "expiration" as they happen (see metrics.instrument_cache).
+    """
+
+    observer = None
+
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def get_version(self, namespace: str) -> int:
+        ...
+
+    @abstractmethod
+    def bump_version(self, namespace: str) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class InMemoryLRUCache(CacheBackend):
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = 60.0,
+        clock=time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float | None, object]] = (
+            OrderedDict()
+        )
+        self._versions: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            if self.observer:
+                self.observer("miss")
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            if self.observer:
+                self.observer("expiration")
+                self.observer("miss")
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        if self.observer:
+            self.observer("hit")
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+            if self.observer:
+                self.observer("eviction")
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def get_version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace: str) -> int:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        return self._versions[namespace]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._versions.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class NullCache(CacheBackend):
+    def __init__(self):
+        self.misses = 0
+
+    def get(self, key: str):
+        self.misses += 1
+        if self.observer:
+            self.observer("miss")
+        return None
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def get_version(self, namespace: str) -> int:
+        return 0
+
+    def bump_version(self, namespace: str) -> int:
+        return 0
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": "none",
+            "hits": 0,
+            "misses": self.misses,
+            "evictions": 0,
+            "expirations": 0,
+            "size": 0,
+            "maxsize": 0,
+        }
+
+
+def create_cache(
+    backend: str = CACHE_BACKEND,
+    maxsize: int = CACHE_MAXSIZE,
+    ttl: float = CACHE_TTL_SECONDS,
+) -> CacheBackend:
+    if backend == "memory":
+        return InMemoryLRUCache(maxsize=maxsize, ttl=ttl)
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def make_key(prefix: str, **params) -> str:
+    return prefix + ":" + json.dumps(
+        params, sort_keys=True, separators=(",", ":"), default=str
+    )
@@ -0,0 +1,146 @@
+import os
+from dataclasses import dataclass, field, replace
+
+import dotenv
+
+dotenv.load_dotenv()
+
+
+def env_str(name: str, default: str | None = None) -> str | None:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name: str, default: int) -> int:
+    return int(env_str(name, str(default)))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(env_str(name, str(default)))
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def parse_key_values(raw: str | None) -> dict:
+    """Parse "a=1,b=2" into {"a": "1", "b": "2"}."""
+    result = {}
+    for item in (raw or "").split(","):
+        if item.strip():
+            key, _, value = item.partition("=")
+            result[key.strip()] = value.strip()
+    return result
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    user: str = "postgres"
+    password: str = "postgres"
+    host: str = "localhost"
+    port: int = 5432
+    name: str = "books_db"
+    # Full SQLAlchemy URL; overrides the individual parts above.
+    url_override: str | None = None
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = False
+    # asyncpg prepared statement cache per connection (0 disables it,
+    # which is required behind PgBouncer in transaction mode).
+    statement_cache_size: int = 100
+    server_settings: dict = field(default_factory=dict)
+    # Read replicas: full SQLAlchemy URLs, each with the pool settings
+    # above.
+    read_urls: tuple = ()
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            user=env_str("DATABASE_USER", cls.user),
+            password=env_str("DATABASE_PASSWORD", cls.password),
+            host=env_str("DATABASE_HOST", cls.host),
+            port=env_int("DATABASE_PORT", cls.port),
+            name=env_str("DATABASE_NAME", cls.name),
+            url_override=env_str("DATABASE_URL"),
+            echo=env_bool("DATABASE_ECHO", cls.echo),
+            pool_size=env_int("DATABASE_POOL_SIZE", cls.pool_size),
+            max_overflow=env_int("DATABASE_MAX_OVERFLOW", cls.max_overflow),
+            pool_timeout=env_float("DATABASE_POOL_TIMEOUT", cls.pool_timeout),
+            pool_recycle=env_int("DATABASE_POOL_RECYCLE", cls.pool_recycle),
+            pool_pre_ping=env_bool(
+                "DATABASE_POOL_PRE_PING", cls.pool_pre_ping
+            ),
+            statement_cache_size=env_int(
+                "DATABASE_STATEMENT_CACHE_SIZE", cls.statement_cache_size
+            ),
+            server_settings=parse_key_values(
+                env_str("DATABASE_SERVER_SETTINGS")
+            ),
+            read_urls=tuple(
+                url.strip()
+                for url in (env_str("DATABASE_READ_URLS") or "").split(",")
+                if url.strip()
+            ),
+        )
+
+    @property
+    def url(self) -> str:
+        if self.url_override:
+            return self.url_override
+        return (
+            f"postgresql+asyncpg://{self.user}:"
+            f"{self.password}@{self.host}:"
+            f"{self.port}/{self.name}"
+        )
+
+    def replica_settings(self) -> list["DatabaseSettings"]:
+        return [
+            replace(self, url_override=url, read_urls=())
+            for url in self.read_urls
+        ]
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.url.startswith("sqlite")
+
+    def engine_kwargs(self) -> dict:
+        kwargs = {
+            "echo": self.echo,
+            "future": True,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+        if self.is_sqlite:
+            return kwargs
+
+        kwargs.update(
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+        )
+        if "+asyncpg" in self.url:
+            kwargs["connect_args"] = {
+                "statement_cache_size": self.statement_cache_size,
+                "server_settings": dict(self.server_settings),
+            }
+        return kwargs
+
+    def describe(self) -> str:
+        parts = [f"echo={self.echo}", f"pool_pre_ping={self.pool_pre_ping}"]
+        if not self.is_sqlite:
+            parts += [
+                f"pool_size={self.pool_size}",
+                f"max_overflow={self.max_overflow}",
+                f"pool_timeout={self.pool_timeout}",
+                f"pool_recycle={self.pool_recycle}",
+            ]
+        if "+asyncpg" in self.url:
+            parts.append(f"statement_cache_size={self.statement_cache_size}")
+            parts.append(f"server_settings={self.server_settings}")
+        return " ".join(parts)
@@ -0,0 +1,215 @@
+import codecs
+import csv
+import io
+import json
+from itertools import islice
+
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+READ_SIZE = 64 * 1024
+MAX_RECORD_SIZE = 1024 * 1024
+
+FORMATS = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+}
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+def detect_format(filename: str) -> str:
+    for extension, fmt in FORMATS.items():
+        if filename.lower().endswith(extension):
+            return fmt
+    raise HTTPException(
+        status_code=400,
+        detail="Only JSON, NDJSON and CSV files are supported"
+    )
+
+
+def _text_chunks(fp):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    while True:
+        data = fp.read(READ_SIZE)
+        if not data:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+
+def iter_json_array(fp):
+    """Yield the objects of a top-level JSON array one at a time.
+
+    Only the current, not yet complete element is buffered, so memory
+    is bounded by MAX_RECORD_SIZE rather than by the file size.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    state = "start"
+    for chunk in _text_chunks(fp):
+        buffer += chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                break
+
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise InvalidUpload("Expected a JSON array")
+                pos += 1
+                state = "first"
+            elif state == "first" and char == "]":
+                state = "end"
+                pos += 1
+            elif state in ("first", "value"):
+                if char != "{":
+                    raise InvalidUpload("Array items must be objects")
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Most likely split across reads; wait for more data.
+                    if len(buffer) - pos > MAX_RECORD_SIZE:
+                        raise InvalidUpload("Record too large or invalid")
+                    break
+                yield item
+                pos = end
+                state = "separator"
+            elif state == "separator":
+                if char == ",":
+                    state = "value"
+                elif char == "]":
+                    state = "end"
+                else:
+                    raise InvalidUpload("Expected ',' or ']'")
+                pos += 1
+            else:
+                raise InvalidUpload("Unexpected data after the array")
+        buffer = buffer[pos:]
+
+    if state != "end" or buffer.strip():
+        raise InvalidUpload("Unexpected end of JSON array")
+
+
+def iter_ndjson(fp):
+    buffer = ""
+    for chunk in _text_chunks(fp):
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield _load_object(line)
+        if len(buffer) > MAX_RECORD_SIZE:
+            raise InvalidUpload("Record too large")
+    if buffer.strip():
+        yield _load_object(buffer)
+
+
+def _load_object(line: str) -> dict:
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError:
+        raise InvalidUpload("Invalid JSON line")
+    if not isinstance(item, dict):
+        raise InvalidUpload("Each line must be a JSON object")
+    return item
+
+
+def iter_csv(fp):
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+    try:
+        for row in csv.DictReader(text):
+            yield {key: value for key, value in row.items() if key}
+    finally:
+        # Leave the underlying upload open; FastAPI closes it.
+        text.detach()
+
+
+PARSERS = {
+    "json": iter_json_array,
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
+
+
+async def iter_upload_batches(file: UploadFile, fmt: str, batch_size: int):
+    """Yield lists of at most `batch_size` raw records from an upload.
+
+    Parsing runs in the threadpool straight off the spooled upload file,
+    so the event loop never blocks and the file is never fully loaded.
+    """
+    await file.seek(0)
+    records = PARSERS[fmt](file.file)
+
+    def next_batch():
+        return list(islice(records, batch_size))
+
+    while True:
+        try:
+            batch = await run_in_threadpool(next_batch)
+        except (InvalidUpload, UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid {fmt.upper()} file: {exc}"
+            )
+        if not batch:
+            return
+        yield batch
+
+
+def validate_batch(batch: list, model: type[BaseModel], first_row: int):
+    items = []
+    for row_number, record in enumerate(batch, start=first_row):
+        try:
+            items.append(model.model_validate(record))
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid row {row_number}: {field}: {error['msg']}"
+            )
+    return items
+
+
+async def ingest_upload(
+    file: UploadFile,
+    model: type[BaseModel],
+    importer,
+    chunk_size: int,
+) -> dict:
+    """Validate and import an upload chunk by chunk.
+
+    `importer` receives each validated chunk and commits it, so a failure
+    part-way leaves the earlier chunks in place; the error says how many
+    rows were committed before it.
+    """
+    fmt = detect_format(file.filename)
+    chunks = []
+    total_rows = 0
+    try:
+        async for batch in iter_upload_batches(file, fmt, chunk_size):
+            items = validate_batch(batch, model, total_rows + 1)
+            await importer(items)
+            total_rows += len(items)
+            chunks.append({
+                "chunk": len(chunks) + 1,
+                "rows": len(items),
+                "total_rows": total_rows,
+            })
+    except HTTPException as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=f"{exc.detail} ({total_rows} rows committed before "
+                   f"the error)",
+        )
+    return {"total_rows": total_rows, "chunks": chunks}
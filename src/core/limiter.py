@@ -1,4 +1,26 @@
+import os
+
+import dotenv
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address)
+from src.core.config import env_bool
+# Registers the sqlite:// scheme with `limits`.
+from src.core import rate_limit_storage  # noqa: F401
+
+dotenv.load_dotenv()
+
+# memory:// keeps counters per worker. Use sqlite:////path/limits.db to
+# share them between the workers of one host, or redis://host:6379 (with
+# the `redis` package installed) to share them between hosts.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "fixed-window")
+# Load tests against a running server need the limits switched off.
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY,
+    enabled=RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,296 @@
+"""Prometheus metrics for HTTP requests, rate limiting and the DB pool.
+
+With more than one worker process (uvicorn --workers N, gunicorn),
+point PROMETHEUS_MULTIPROC_DIR at an empty directory shared by all of
+them before the app starts. Every worker then writes its samples there
+and /metrics, whichever worker serves it, aggregates all of them.
+"""
+import os
+import re
+import time
+
+# Loads .env, so PROMETHEUS_MULTIPROC_DIR is set before prometheus_client
+# picks its (single or multi process) value class on import.
+from src.core.config import env_bool
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from slowapi import _rate_limit_exceeded_handler
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_PATH = "/metrics"
+UNMATCHED = "unmatched"
+PARAM_GROUP = re.compile(r"\(\?P<\w+>")
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response is sent.",
+    ["method", "route"],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    ),
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled.",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+RATE_LIMITED = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected with 429 by the rate limiter.",
+    ["route", "limit"],
+)
+POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured persistent connections.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+CACHE_EVENTS = Counter(
+    "cache_events_total",
+    "Cache lookups (hit, miss) and removals (eviction, expiration).",
+    ["cache", "event"],
+)
+STATEMENTS = Counter(
+    "db_statement_executions_total",
+    "Executions per memoized statement shape.",
+    ["shape"],
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including any wait.",
+    ["pool"],
+    buckets=(
+        0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0
+    ),
+)
+
+
+class RouteTemplates:
+    """Find the path template ("/books/{book_id}") serving a request.
+
+    Labelling by template rather than by raw path keeps the number of
+    series bounded however many ids are requested. The path regexes of
+    all routes accepting a method are folded, in registration order,
+    into one alternation, so a lookup is a single regex match rather
+    than a `Route.matches()` call per route.
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self._patterns = {}
+        self._templates = []
+        self._route_count = -1
+
+    def _compile(self, method):
+        branches = []
+        for index, route in enumerate(self.router.routes):
+            regex = getattr(route, "path_regex", None)
+            methods = getattr(route, "methods", ())
+            if regex is None or not (
+                method is None or methods is None or method in methods
+            ):
+                continue
+            body = PARAM_GROUP.sub("(?:", regex.pattern[1:-1])
+            branches.append(f"(?P<r{index}>{body})")
+        return re.compile("^(?:" + "|".join(branches) + ")$")
+
+    def __call__(self, scope) -> str:
+        routes = self.router.routes
+        # Routers are mutable; start over when routes were added.
+        if len(routes) != self._route_count:
+            self._patterns.clear()
+            self._templates = [getattr(r, "path", "") for r in routes]
+            self._route_count = len(routes)
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        # Try routes for this method first, then any method (a 405).
+        for method in (scope["method"], None):
+            pattern = self._patterns.get(method)
+            if pattern is None:
+                pattern = self._patterns[method] = self._compile(method)
+            match = pattern.match(path)
+            if match:
+                return self._templates[int(match.lastgroup[1:])]
+        return UNMATCHED
+
+
+class MetricsMiddleware:
+    def __init__(self, app, router):
+        self.app = app
+        self.route_template = RouteTemplates(router)
+        self._children = {}
+
+    def _metrics(self, method, route):
+        key = (method, route)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                IN_PROGRESS.labels(method, route),
+                LATENCY.labels(method, route),
+                {},
+            )
+        return children
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.route_template(scope)
+        in_progress, latency, counters = self._metrics(method, route)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            latency.observe(time.perf_counter() - start)
+            counter = counters.get(status)
+            if counter is None:
+                counter = counters[status] = REQUESTS.labels(
+                    method, route, str(status)
+                )
+            counter.inc()
+            in_progress.dec()
+
+
+def rate_limit_exceeded_handler(request, exc):
+    route = request.scope.get("route")
+    RATE_LIMITED.labels(
+        route.path if route else UNMATCHED, str(exc.limit.limit)
+    ).inc()
+    return _rate_limit_exceeded_handler(request, exc)
+
+
+def _time_checkouts(pool, name: str) -> None:
+    # Pools emit no event when a checkout starts, so time the public
+    # connect(), which includes any wait for a free connection.
+    wait = POOL_WAIT.labels(name)
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            wait.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+    if isinstance(pool, QueuePool):
+        POOL_SIZE.labels(name).set(pool.size())
+
+
+def instrument_pool(engine, name: str = "primary") -> None:
+    """Export checkout, overflow and wait-time metrics for `engine`."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    checked_out = POOL_CHECKED_OUT.labels(name)
+    overflow = POOL_OVERFLOW.labels(name)
+    size = pool.size() if isinstance(pool, QueuePool) else None
+    opened = 0
+
+    # The gauges follow pool events rather than reading checkedout() and
+    # overflow() at scrape time: a scrape-time callback is not shared in
+    # multiprocess mode, and the checkin event fires before the pool has
+    # taken the connection back. Pool events are registered on the
+    # engine, so they also cover the pool dispose() swaps in.
+    def count_open(delta):
+        nonlocal opened
+        opened += delta
+        if size is not None:
+            overflow.set(max(opened - size, 0))
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, record):
+        count_open(1)
+
+    @event.listens_for(sync_engine, "close")
+    def on_close(dbapi_connection, record):
+        count_open(-1)
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, record, proxy):
+        checked_out.inc()
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, record):
+        checked_out.dec()
+
+    @event.listens_for(sync_engine, "detach")
+    def on_detach(dbapi_connection, record):
+        # A detached connection leaves the pool without a checkin.
+        checked_out.dec()
+        count_open(-1)
+
+    _time_checkouts(pool, name)
+
+    @event.listens_for(sync_engine, "engine_disposed")
+    def reinstrument(_):
+        # dispose() replaces the pool with a fresh one.
+        _time_checkouts(sync_engine.pool, name)
+
+
+def instrument_cache(cache, name: str) -> None:
+    """Count hits, misses, evictions and expirations of `cache`."""
+    children = {
+        kind: CACHE_EVENTS.labels(name, kind)
+        for kind in ("hit", "miss", "eviction", "expiration")
+    }
+    cache.observer = lambda kind: children[kind].inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
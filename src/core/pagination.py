@@ -0,0 +1,55 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+# JSON types a cursor key may have per sort column; author_id is
+# nullable, so its cursor can carry null.
+KEY_TYPES = {
+    "id": (int,),
+    "title": (str,),
+    "published_year": (int,),
+    "author_id": (int, type(None)),
+}
+# INTEGER columns; a larger value would fail in the driver, not here.
+INT_RANGE = range(-2**31, 2**31)
+
+
+def _valid_key(value, types) -> bool:
+    # bool is an int subclass, but true is never a valid key.
+    if isinstance(value, bool) or not isinstance(value, types):
+        return False
+    return not isinstance(value, int) or value in INT_RANGE
+
+
+def encode_cursor(sort_by: str, sort_order: str, row) -> str:
+    payload = {
+        "s": sort_by,
+        "o": sort_order,
+        "k": row[sort_by],
+        "id": row["id"],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        key, last_id = payload["k"], payload["id"]
+        cursor_sort, cursor_order = payload["s"], payload["o"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not _valid_key(last_id, (int,)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort_by or cursor_order != sort_order:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor does not match sort_by/sort_order"
+        )
+    if not _valid_key(key, KEY_TYPES.get(sort_by, (int,))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key, last_id
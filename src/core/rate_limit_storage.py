@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.errors import ConfigurationError
+from limits.storage import Storage
+from limits.storage.base import (
+    SlidingWindowCounterSupport,
+    TimestampedSlidingWindow,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+INCR = """
+INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN expires_at <= ?
+        THEN excluded.count ELSE count + excluded.count END,
+    expires_at = CASE WHEN expires_at <= ?
+        THEN excluded.expires_at ELSE expires_at END
+RETURNING count
+"""
+
+# Expired counters are deleted once every this many increments.
+PURGE_EVERY = 1000
+
+
+class SQLiteStorage(
+    Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow
+):
+    """Rate limit counters in a SQLite file shared by every process.
+
+    ``sqlite:///relative/path.db`` or ``sqlite:////absolute/path.db``.
+    The file runs in WAL mode without fsync on commit: counters are
+    cheap to lose, so a crash may only forget recent hits. Each thread
+    of each process keeps its own connection, and every update is a
+    single statement or an IMMEDIATE transaction, so concurrent workers
+    never double count.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(
+        self,
+        uri: str,
+        wrap_exceptions: bool = False,
+        timeout: float = 5.0,
+        **options,
+    ):
+        path = uri.split("://", 1)[1][1:] if "://" in uri else ""
+        if not path or path == ":memory:":
+            raise ConfigurationError(
+                "sqlite rate limit storage needs a file path, "
+                "e.g. sqlite:////tmp/rate_limits.db"
+            )
+        self.path = path
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._increments = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._connection()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A forked worker must not reuse its parent's connection.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._enable_wal(conn)
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _enable_wal(self, conn: sqlite3.Connection) -> None:
+        # Switching the journal mode can fail with "database is locked"
+        # without going through the busy timeout when several processes
+        # open a new file at once, so retry until the timeout.
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.01)
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        conn = self._connection()
+        count = conn.execute(
+            INCR, (key, amount, now + expiry, now, now)
+        ).fetchone()[0]
+        self._increments += 1
+        if self._increments % PURGE_EVERY == 0:
+            conn.execute(
+                "DELETE FROM rate_limits WHERE expires_at <= ?", (now,)
+            )
+        return count
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        row = self._connection().execute(
+            "UPDATE rate_limits SET count = max(count - ?, 0) "
+            "WHERE key = ? AND expires_at > ? RETURNING count",
+            (amount, key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limits "
+            "WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int | None:
+        return self._connection().execute(
+            "DELETE FROM rate_limits"
+        ).rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute(
+            "DELETE FROM rate_limits WHERE key = ?", (key,)
+        )
+
+    def acquire_sliding_window_entry(
+        self, key: str, limit: int, expiry: int, amount: int = 1
+    ) -> bool:
+        if amount > limit:
+            return False
+        conn = self._connection()
+        # Hold the write lock across the read and the increment so two
+        # workers cannot both take the last slot.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            previous_key, current_key = self.sliding_window_keys(
+                key, expiry, now
+            )
+            previous_count, previous_ttl, current_count, _ = (
+                self._sliding_window_info(
+                    previous_key, current_key, expiry, now
+                )
+            )
+            weighted = previous_count * previous_ttl / expiry + current_count
+            acquired = floor(weighted) + amount <= limit
+            if acquired:
+                conn.execute(
+                    INCR, (current_key, amount, now + 2 * expiry, now, now)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def _sliding_window_info(self, previous_key, current_key, expiry, now):
+        previous_count = self.get(previous_key)
+        current_count = self.get(current_key)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(
+        self, key: str, expiry: int
+    ) -> tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window_info(
+            previous_key, current_key, expiry, now
+        )
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(
+            key, expiry, time.time()
+        )
+        self.clear(previous_key)
+        self.clear(current_key)
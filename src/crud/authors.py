@@ -1,9 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
-from src.db.models import Author
+from sqlalchemy import and_, func, select
+from src.db.dialect import dialect_name, escape_like, upsert_insert
+from src.db.models import Author, Book
 from src.schemas.author import AuthorCreate
 from typing import List
 
+BULK_BATCH_SIZE = 1000
+
 
 async def create_author(db: AsyncSession, author: AuthorCreate) -> Author:
     new_author = Author(name=author.name)
@@ -13,32 +16,94 @@ async def create_author(db: AsyncSession, author: AuthorCreate) -> Author:
     return new_author
 
 
-async def get_authors(db: AsyncSession):
-    result = await db.execute(select(Author))
-    return result.scalars().all()
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """Smallest string above every string starting with `prefix`."""
+    while prefix:
+        last = ord(prefix[-1]) + 1
+        if last == 0xD800:
+            # Surrogates cannot be encoded; skip past them.
+            last = 0xE000
+        if last <= 0x10FFFF:
+            return prefix[:-1] + chr(last)
+        prefix = prefix[:-1]
+    return None
 
 
-async def bulk_import_authors(db: AsyncSession, authors: List[AuthorCreate]):
-    results = []
-    for author in authors:
-        # Перевірка чи існує автор
-        check_query = text("SELECT id, name FROM authors WHERE name = :name")
-        existing = await db.execute(check_query, {"name": author.name})
-        row = existing.mappings().first()
-
-        if row:  # вже є → додаємо у results, але не вставляємо
-            results.append(row)
-        else:  # ще нема → вставляємо
-            insert_query = text(
-                """
-                INSERT INTO authors (name)
-                VALUES (:name)
-                RETURNING id, name
-            """
+def _name_prefix_filter(db: AsyncSession, prefix: str):
+    name = Author.__table__.c.name_lower
+    prefix = prefix.lower()
+    if dialect_name(db) == "postgresql":
+        # Served by the name_lower text_pattern_ops index.
+        return name.like(escape_like(prefix) + "%", escape="\\")
+    # SQLite only uses the name_lower index for a range, not for LIKE.
+    upper = _prefix_upper_bound(prefix)
+    if upper is None:
+        return name >= prefix
+    return and_(name >= prefix, name < upper)
+
+
+async def get_authors(
+    db: AsyncSession,
+    limit: int = None,
+    after_id: int = None,
+    name_prefix: str = None,
+    with_book_count: bool = False,
+):
+    # Core rows rather than ORM entities: no identity map bookkeeping and
+    # no chance of touching the lazy Author.books relationship.
+    authors = Author.__table__
+    query = select(authors.c.id, authors.c.name)
+    if name_prefix:
+        query = query.where(_name_prefix_filter(db, name_prefix))
+    if after_id is not None:
+        query = query.where(authors.c.id > after_id)
+    query = query.order_by(authors.c.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    if with_book_count:
+        # Page first, then count books for just that page in the same
+        # statement.
+        page = query.subquery("page")
+        books = Book.__table__
+        query = (
+            select(
+                page.c.id,
+                page.c.name,
+                func.count(books.c.id).label("book_count"),
+            )
+            .select_from(
+                page.outerjoin(books, books.c.author_id == page.c.id)
             )
-            result = await db.execute(insert_query, {"name": author.name})
-            row = result.mappings().first()
-            results.append(row)
+            .group_by(page.c.id, page.c.name)
+            .order_by(page.c.id)
+        )
+
+    result = await db.execute(query)
+    return result.all()
+
+
+async def bulk_import_authors(db: AsyncSession, authors: List[AuthorCreate]):
+    # Names repeated inside the file are sent once; results are mapped
+    # back so every input item gets its row, in input order.
+    names = list(dict.fromkeys(author.name for author in authors))
+    table = Author.__table__
+    rows_by_name = {}
+
+    for start in range(0, len(names), BULK_BATCH_SIZE):
+        batch = names[start:start + BULK_BATCH_SIZE]
+        insert_stmt = upsert_insert(db, table).values(
+            [{"name": name} for name in batch]
+        )
+        # DO UPDATE (rather than DO NOTHING) makes RETURNING include the
+        # rows that already existed, saving a follow-up SELECT.
+        insert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"name": insert_stmt.excluded.name},
+        ).returning(table.c.id, table.c.name)
+        result = await db.execute(insert_stmt)
+        for row in result.mappings():
+            rows_by_name[row["name"]] = dict(row)
 
     await db.commit()
-    return results
+    return [rows_by_name[author.name] for author in authors]
@@ -0,0 +1,77 @@
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Columns whose change moves a book between summary buckets.
+STATS_COLUMNS = {"genre", "published_year", "author_id"}
+
+UPSERT_GENRE_YEAR = text(
+    """
+    INSERT INTO book_genre_year_counts (genre, published_year, book_count)
+    VALUES (:genre, :published_year, :delta)
+    ON CONFLICT (genre, published_year) DO UPDATE
+    SET book_count = book_genre_year_counts.book_count + excluded.book_count
+"""
+)
+
+UPSERT_AUTHOR_GENRE = text(
+    """
+    INSERT INTO author_genre_counts (author_id, genre, book_count)
+    VALUES (:author_id, :genre, :delta)
+    ON CONFLICT (author_id, genre) DO UPDATE
+    SET book_count = author_genre_counts.book_count + excluded.book_count
+"""
+)
+
+REBUILD_STATEMENTS = (
+    "DELETE FROM book_genre_year_counts",
+    "INSERT INTO book_genre_year_counts (genre, published_year, book_count) "
+    "SELECT genre, published_year, COUNT(*) FROM books "
+    "GROUP BY genre, published_year",
+    "DELETE FROM author_genre_counts",
+    "INSERT INTO author_genre_counts (author_id, genre, book_count) "
+    "SELECT author_id, genre, COUNT(*) FROM books "
+    "WHERE author_id IS NOT NULL GROUP BY author_id, genre",
+)
+
+
+async def apply_book_deltas(
+    db: AsyncSession, removed=(), added=()
+) -> None:
+    """Move books out of and into their summary buckets.
+
+    `removed` and `added` are book rows (mappings with genre,
+    published_year and author_id). Runs in the caller's transaction, so
+    the summaries commit or roll back together with the books.
+    """
+    genre_years = Counter()
+    author_genres = Counter()
+    for rows, sign in ((removed, -1), (added, 1)):
+        for row in rows:
+            genre_years[(row["genre"], row["published_year"])] += sign
+            if row["author_id"] is not None:
+                author_genres[(row["author_id"], row["genre"])] += sign
+
+    # Sorted, so concurrent writers lock summary rows in the same order
+    # and cannot deadlock each other.
+    genre_year_params = [
+        {"genre": genre, "published_year": year, "delta": delta}
+        for (genre, year), delta in sorted(genre_years.items())
+        if delta
+    ]
+    author_genre_params = [
+        {"author_id": author_id, "genre": genre, "delta": delta}
+        for (author_id, genre), delta in sorted(author_genres.items())
+        if delta
+    ]
+    if genre_year_params:
+        await db.execute(UPSERT_GENRE_YEAR, genre_year_params)
+    if author_genre_params:
+        await db.execute(UPSERT_AUTHOR_GENRE, author_genre_params)
+
+
+def rebuild_book_stats(conn) -> None:
+    """Recount every summary from the books table (sync connection)."""
+    for statement in REBUILD_STATEMENTS:
+        conn.execute(text(statement))
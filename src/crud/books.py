@@ -1,8 +1,76 @@
+from collections import Counter
+from functools import lru_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import bindparam, select, text, tuple_
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.exc import IntegrityError
+from src.core.cache import create_cache, make_key
+from src.core.metrics import STATEMENTS
+from src.crud.book_stats import STATS_COLUMNS, apply_book_deltas
+from src.db.dialect import dialect_name, escape_like, upsert_insert
+from src.db.models import Book
+from src.db.replicas import may_fill_cache, may_read_cache, note_write
 from src.schemas.book import BookCreate, BookUpdate
-from typing import List
+from typing import List, NamedTuple
 from fastapi import HTTPException
+import json
+import re
+
+ALLOWED_SORT = {"id", "title", "published_year", "author_id"}
+NULLABLE_SORT = {"author_id"}
+BULK_BATCH_SIZE = 1000
+BOOK_LIST_NAMESPACE = "books:list"
+BOOK_COUNT_PREFIX = "books:count"
+BOOK_FACETS_PREFIX = "books:facets"
+COUNT_FILTER_PARAMS = ("q", "title", "genre", "year_from", "year_to")
+# ?include=author: the author's name comes from the same statement, so a
+# page of books never costs one author lookup per row.
+AUTHOR_JOIN = " LEFT JOIN authors ON authors.id = books.author_id"
+AUTHOR_COLUMNS = ", authors.name AS author_name"
+
+book_cache = create_cache()
+
+# Executions per statement shape. Each shape maps to one memoized text()
+# construct, so the number of keys bounds how many distinct statements
+# the driver has to prepare per connection.
+statement_counts: Counter = Counter()
+
+
+def statement_stats() -> dict:
+    return dict(statement_counts)
+
+
+def _count_statement(label: str) -> None:
+    statement_counts[label] += 1
+    # Also in /metrics, to check statement reuse on a running server.
+    STATEMENTS.labels(label).inc()
+
+
+def _book_key(book_id: int, include_author: bool = False) -> str:
+    if include_author:
+        return f"books:item:{book_id}:author"
+    return f"books:item:{book_id}"
+
+
+def _cache_get(db: AsyncSession, key: str):
+    if not may_read_cache(db):
+        return None
+    return book_cache.get(key)
+
+
+def _cache_set(db: AsyncSession, key: str, value) -> None:
+    if may_fill_cache(db):
+        book_cache.set(key, value)
+
+
+def _invalidate_books(*book_ids: int) -> None:
+    note_write()
+    for book_id in book_ids:
+        book_cache.delete(_book_key(book_id))
+        book_cache.delete(_book_key(book_id, include_author=True))
+    # Any write can move rows in or out of any cached page, so list
+    # entries are dropped together by bumping their namespace version.
+    book_cache.bump_version(BOOK_LIST_NAMESPACE)
 
 
 async def create_book(db: AsyncSession, book: BookCreate):
@@ -23,14 +91,210 @@ async def create_book(db: AsyncSession, book: BookCreate):
         RETURNING id, title, genre, published_year, author_id
     """
     )
-    result = await db.execute(query, book.model_dump())
+    try:
+        result = await db.execute(query, book.model_dump())
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Book with this title already exists for this author"
+        )
     row = result.mappings().first()
+    await apply_book_deltas(db, added=[row])
     await db.commit()
+    _invalidate_books()
     return row
 
 
-async def get_books(
-    db: AsyncSession,
+def _title_filter(dialect: str, escaped: bool) -> str:
+    if dialect == "postgresql":
+        return " AND title ILIKE :title"
+    if dialect == "sqlite":
+        # FTS5 cannot use the trigram index for a LIKE with an ESCAPE
+        # clause. Without one, % and _ in the term are wildcards, which
+        # still matches every row the escaped pattern does, so the index
+        # narrows the rows and the escaped LIKE only rechecks those.
+        if not escaped:
+            return (
+                " AND books.id IN (SELECT rowid FROM books_trgm"
+                " WHERE title LIKE :title)"
+            )
+        return (
+            " AND books.id IN (SELECT rowid FROM books_trgm"
+            " WHERE title LIKE :title_trgm"
+            " AND title LIKE :title ESCAPE '\\')"
+        )
+    return " AND LOWER(title) LIKE LOWER(:title) ESCAPE '\\'"
+
+
+def _search_terms(q: str) -> list[str]:
+    return re.findall(r"\w+", q.lower())
+
+
+class BooksQueryShape(NamedTuple):
+    """Which clauses a book list query has; the values are bound later.
+
+    There are fewer than a thousand shapes per dialect, so each one is
+    turned into SQL and a text() construct once and reused, which keeps
+    SQLAlchemy's compiled cache and the driver's prepared statement
+    cache warm.
+    """
+
+    dialect: str
+    search: bool
+    title: bool
+    genre: bool
+    year_from: bool
+    year_to: bool
+    sort_by: str
+    descending: bool
+    keyset: bool
+    paged: bool
+    author: bool = False
+    title_escaped: bool = False
+    # Keyset pages on a nullable column: "" continues after a non-NULL
+    # key, "after" after a NULL one; "only" and "none" start the NULL or
+    # the non-NULL rows.
+    nulls: str = ""
+
+    @property
+    def label(self) -> str:
+        filters = [
+            name for name in (
+                "search", "title", "genre", "year_from", "year_to"
+            )
+            if getattr(self, name)
+        ]
+        parts = [
+            "books.list",
+            self.dialect,
+            "+".join(filters) or "all",
+            f"{self.sort_by}_{'desc' if self.descending else 'asc'}",
+        ]
+        if self.keyset:
+            parts.append(
+                f"keyset_nulls_{self.nulls}" if self.nulls else "keyset"
+            )
+        if self.author:
+            parts.append("author")
+        if self.title_escaped:
+            parts.append("escaped")
+        parts.append("page" if self.paged else "stream")
+        return ":".join(parts)
+
+
+def _books_filter_sql(shape: BooksQueryShape) -> str:
+    """FROM and WHERE clauses shared by the page and count statements."""
+    dialect = shape.dialect
+    query = " FROM books"
+
+    if shape.author:
+        query += AUTHOR_JOIN
+
+    if shape.search and dialect == "sqlite":
+        query += (
+            " JOIN (SELECT rowid AS fts_id, bm25(books_fts) AS fts_rank"
+            " FROM books_fts WHERE books_fts MATCH :q) AS fts"
+            " ON fts.fts_id = books.id"
+        )
+
+    query += " WHERE 1=1"
+
+    if shape.search and dialect == "postgresql":
+        query += (
+            " AND to_tsvector('english', title)"
+            " @@ plainto_tsquery('english', :q)"
+        )
+
+    if shape.title:
+        query += _title_filter(dialect, shape.title_escaped)
+
+    if shape.genre:
+        query += " AND genre = :genre"
+
+    if shape.year_from:
+        query += " AND published_year >= :year_from"
+
+    if shape.year_to:
+        query += " AND published_year <= :year_to"
+    return query
+
+
+def _nulls_last(shape: BooksQueryShape) -> bool:
+    # ORDER BY keeps each database's own placement, which its indexes
+    # follow: PostgreSQL sorts NULL as the largest value, SQLite as the
+    # smallest.
+    return (shape.dialect == "postgresql") != shape.descending
+
+
+def _keyset_filter(shape: BooksQueryShape, op: str) -> str:
+    # A row value comparison is never true for a NULL key, so a page
+    # reads only the NULL or only the non-NULL rows, each with an index
+    # seek; get_books continues into the other ones on a short page.
+    sort_by = shape.sort_by
+    if shape.nulls == "after":
+        return f" AND {sort_by} IS NULL AND books.id {op} :after_id"
+    if shape.nulls == "only":
+        return f" AND {sort_by} IS NULL"
+    if shape.nulls == "none":
+        return f" AND {sort_by} IS NOT NULL"
+    return f" AND ({sort_by}, books.id) {op} (:after_key, :after_id)"
+
+
+def _next_rows_shape(shape: BooksQueryShape):
+    """Shape reading the rows after a keyset page's own ones, or None."""
+    if shape.sort_by not in NULLABLE_SORT or shape.nulls not in ("", "after"):
+        return None
+    if shape.nulls == "" and _nulls_last(shape):
+        return shape._replace(nulls="only")
+    if shape.nulls == "after" and not _nulls_last(shape):
+        return shape._replace(nulls="none")
+    return None
+
+
+def _books_sql(shape: BooksQueryShape) -> str:
+    dialect = shape.dialect
+    columns = "books.*"
+    if shape.author:
+        columns += AUTHOR_COLUMNS
+    query = "SELECT " + columns + _books_filter_sql(shape)
+
+    sort_by = shape.sort_by
+    order = "DESC" if shape.descending else "ASC"
+
+    # Keyset pagination: continue strictly after the last (key, id) seen,
+    # so the database seeks into the index instead of skipping rows.
+    if shape.keyset:
+        op = "<" if shape.descending else ">"
+        if sort_by == "id":
+            query += f" AND books.id {op} :after_id"
+        else:
+            query += _keyset_filter(shape, op)
+
+    if shape.search and dialect == "sqlite":
+        query += " ORDER BY fts.fts_rank, books.id"
+    elif shape.search and dialect == "postgresql":
+        query += (
+            " ORDER BY ts_rank(to_tsvector('english', title),"
+            " plainto_tsquery('english', :q)) DESC, books.id"
+        )
+    elif sort_by == "id":
+        query += f" ORDER BY books.id {order}"
+    else:
+        query += f" ORDER BY {sort_by} {order}, books.id {order}"
+
+    if shape.paged:
+        query += " LIMIT :limit OFFSET :offset"
+    return query
+
+
+@lru_cache(maxsize=None)
+def books_statement(shape: BooksQueryShape) -> TextClause:
+    return text(_books_sql(shape))
+
+
+def books_query_shape(
+    dialect: str,
     title: str = None,
     genre: str = None,
     year_from: int = None,
@@ -39,66 +303,532 @@ async def get_books(
     offset: int = 0,
     sort_by: str = "id",
     sort_order: str = "asc",
-):
-    query = "SELECT * FROM books WHERE 1=1"
+    after: tuple = None,
+    q: str = None,
+    include_author: bool = False,
+) -> tuple[BooksQueryShape, dict]:
+    search = bool(q) and dialect in ("sqlite", "postgresql")
     params = {}
 
-    if title:
-        query += " AND LOWER(title) LIKE :title"
-        params["title"] = f"%{title.lower()}%"
+    if search and dialect == "sqlite":
+        terms = _search_terms(q)
+        params["q"] = " ".join(f'"{term}"' for term in terms) or '""'
+    elif search:
+        params["q"] = q
 
+    title_escaped = False
+    if title:
+        params["title"] = f"%{escape_like(title)}%"
+        title_escaped = params["title"] != f"%{title}%"
+        if title_escaped and dialect == "sqlite":
+            params["title_trgm"] = f"%{title}%"
     if genre:
-        query += " AND genre = :genre"
         params["genre"] = genre
-
     if year_from:
-        query += " AND published_year >= :year_from"
         params["year_from"] = year_from
-
     if year_to:
-        query += " AND published_year <= :year_to"
         params["year_to"] = year_to
 
-    allowed_sort = {"id", "title", "published_year", "author_id"}
-    if sort_by not in allowed_sort:
+    if sort_by not in ALLOWED_SORT:
         sort_by = "id"
 
-    order = "ASC" if sort_order.lower() == "asc" else "DESC"
-    query += f" ORDER BY {sort_by} {order}"
+    keyset = after is not None and not q
+    nulls = ""
+    if keyset:
+        if sort_by != "id" and after[0] is None:
+            nulls = "after"
+        elif sort_by != "id":
+            params["after_key"] = after[0]
+        params["after_id"] = after[1]
+        offset = 0
 
-    query += " LIMIT :limit OFFSET :offset"
-    params["limit"] = limit
-    params["offset"] = offset
+    if limit is not None:
+        params["limit"] = limit
+        params["offset"] = offset
 
-    result = await db.execute(text(query), params)
-    return result.mappings().all()
+    shape = BooksQueryShape(
+        dialect=dialect,
+        search=search,
+        title=bool(title),
+        genre=bool(genre),
+        year_from=bool(year_from),
+        year_to=bool(year_to),
+        sort_by=sort_by,
+        descending=sort_order.lower() != "asc",
+        keyset=keyset,
+        paged=limit is not None,
+        author=include_author,
+        title_escaped=title_escaped,
+        nulls=nulls,
+    )
+    return shape, params
 
 
-async def get_book(db: AsyncSession, book_id: int):
-    query = text("SELECT * FROM books WHERE id = :id")
-    result = await db.execute(query, {"id": book_id})
-    return result.mappings().first()
+def build_books_query(*args, **kwargs) -> tuple[str, dict]:
+    shape, params = books_query_shape(*args, **kwargs)
+    return books_statement(shape).text, params
 
 
-async def update_book(db: AsyncSession, book_id: int, book_data: BookUpdate):
-    fields = book_data.model_dump(exclude_unset=True)
-    if not fields:
+async def get_books(
+    db: AsyncSession,
+    title: str = None,
+    genre: str = None,
+    year_from: int = None,
+    year_to: int = None,
+    limit: int = 10,
+    offset: int = 0,
+    sort_by: str = "id",
+    sort_order: str = "asc",
+    after: tuple = None,
+    q: str = None,
+    include_author: bool = False,
+):
+    if sort_by not in ALLOWED_SORT:
+        sort_by = "id"
+    sort_order = "asc" if sort_order.lower() == "asc" else "desc"
+    if q:
+        after = None
+    if after is not None:
+        offset = 0
+
+    key = make_key(
+        BOOK_LIST_NAMESPACE,
+        v=book_cache.get_version(BOOK_LIST_NAMESPACE),
+        title=title.lower() if title else None,
+        q=" ".join(_search_terms(q)) if q else None,
+        genre=genre,
+        year_from=year_from,
+        year_to=year_to,
+        limit=limit,
+        offset=offset,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        after=after,
+        author=include_author,
+    )
+    cached = _cache_get(db, key)
+    if cached is not None:
+        return cached
+
+    shape, params = books_query_shape(
+        dialect_name(db),
+        title,
+        genre,
+        year_from,
+        year_to,
+        limit,
+        offset,
+        sort_by,
+        sort_order,
+        after,
+        q,
+        include_author,
+    )
+    _count_statement(shape.label)
+    result = await db.execute(books_statement(shape), params)
+    rows = [dict(row) for row in result.mappings().all()]
+
+    next_shape = _next_rows_shape(shape) if shape.keyset else None
+    if next_shape is not None and (limit is None or len(rows) < limit):
+        params.pop("after_key", None)
+        params.pop("after_id")
+        if limit is not None:
+            params["limit"] = limit - len(rows)
+        _count_statement(next_shape.label)
+        result = await db.execute(books_statement(next_shape), params)
+        rows += [dict(row) for row in result.mappings().all()]
+
+    _cache_set(db, key, rows)
+    return rows
+
+
+async def stream_books(
+    db: AsyncSession,
+    title: str = None,
+    genre: str = None,
+    year_from: int = None,
+    year_to: int = None,
+    sort_by: str = "id",
+    sort_order: str = "asc",
+    q: str = None,
+    batch_size: int = 1000,
+    include_author: bool = False,
+):
+    """Yield every matching book in batches from a server-side cursor."""
+    shape, params = books_query_shape(
+        dialect_name(db),
+        title,
+        genre,
+        year_from,
+        year_to,
+        None,
+        0,
+        sort_by,
+        sort_order,
+        None,
+        q,
+        include_author,
+    )
+    _count_statement(shape.label)
+    result = await db.stream(
+        books_statement(shape),
+        params,
+        execution_options={"yield_per": batch_size},
+    )
+    async for partition in result.mappings().partitions(batch_size):
+        yield partition
+
+
+def _count_shape(shape: BooksQueryShape) -> BooksQueryShape:
+    # Sorting and pagination never change how many rows match.
+    return shape._replace(
+        sort_by="id",
+        descending=False,
+        keyset=False,
+        paged=False,
+        author=False,
+    )
+
+
+@lru_cache(maxsize=None)
+def count_statement(shape: BooksQueryShape) -> TextClause:
+    return text("SELECT COUNT(*)" + _books_filter_sql(shape))
+
+
+@lru_cache(maxsize=None)
+def explain_statement(shape: BooksQueryShape) -> TextClause:
+    return text("EXPLAIN (FORMAT JSON) SELECT 1" + _books_filter_sql(shape))
+
+
+# Scales the analyzed row density to the table's current size, the same
+# way the planner estimates an unfiltered scan.
+PG_TABLE_ESTIMATE = text(
+    "SELECT CASE"
+    " WHEN reltuples < 0 THEN NULL"
+    " WHEN relpages = 0 THEN reltuples"
+    " ELSE reltuples / relpages"
+    " * (pg_relation_size(oid) / current_setting('block_size')::int)"
+    " END::bigint"
+    " FROM pg_class WHERE oid = 'books'::regclass"
+)
+
+
+async def _estimate_count(db: AsyncSession, shape, params: dict):
+    """Row estimate from planner statistics, or None if there are none."""
+    if shape.dialect == "postgresql":
+        if not params:
+            result = await db.execute(PG_TABLE_ESTIMATE)
+            return result.scalar()
+        result = await db.execute(explain_statement(shape), params)
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    # SQLite keeps no per-filter estimates; ANALYZE only records the
+    # table size, as the first number of any books index entry.
+    if shape.dialect == "sqlite" and not params:
+        analyzed = await db.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ))
+        if analyzed.scalar() is None:
+            return None
+        result = await db.execute(text(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = 'books' LIMIT 1"
+        ))
+        stat = result.scalar()
+        return int(stat.split()[0]) if stat else None
+    return None
+
+
+async def count_books(
+    db: AsyncSession,
+    title: str = None,
+    genre: str = None,
+    year_from: int = None,
+    year_to: int = None,
+    q: str = None,
+    mode: str = "exact",
+) -> tuple[int, str]:
+    """Count the books matching the filters as (total, "exact"|"estimated").
+
+    Estimates come from planner statistics and fall back to an exact
+    count where the database has none. Both are cached until the next
+    write, like list pages.
+    """
+    key = make_key(
+        BOOK_COUNT_PREFIX,
+        v=book_cache.get_version(BOOK_LIST_NAMESPACE),
+        mode=mode,
+        title=title.lower() if title else None,
+        q=" ".join(_search_terms(q)) if q else None,
+        genre=genre,
+        year_from=year_from,
+        year_to=year_to,
+    )
+    cached = _cache_get(db, key)
+    if cached is not None:
+        return tuple(cached)
+
+    shape, params = books_query_shape(
+        dialect_name(db), title, genre, year_from, year_to, None, q=q
+    )
+    shape = _count_shape(shape)
+    params = {k: params[k] for k in COUNT_FILTER_PARAMS if k in params}
+    label = shape.label.replace("books.list", "books.count", 1)
+
+    total = None
+    if mode == "estimated":
+        _count_statement(label + ":estimated")
+        total = await _estimate_count(db, shape, params)
+    if total is not None:
+        counted = (total, "estimated")
+    else:
+        _count_statement(label)
+        result = await db.execute(count_statement(shape), params)
+        counted = (result.scalar(), "exact")
+    _cache_set(db, key, counted)
+    return counted
+
+
+async def get_book(
+    db: AsyncSession, book_id: int, include_author: bool = False
+):
+    key = _book_key(book_id, include_author)
+    cached = _cache_get(db, key)
+    if cached is not None:
+        return cached
+
+    if include_author:
+        query = text(
+            "SELECT books.*" + AUTHOR_COLUMNS + " FROM books" + AUTHOR_JOIN
+            + " WHERE books.id = :id"
+        )
+    else:
+        query = text("SELECT * FROM books WHERE id = :id")
+    result = await db.execute(query, {"id": book_id})
+    row = result.mappings().first()
+    if row is None:
         return None
 
-    set_clause = ", ".join([f"{k} = :{k}" for k in fields.keys()])
-    fields["id"] = book_id
+    book = dict(row)
+    _cache_set(db, key, book)
+    return book
 
-    query = text(
+
+async def get_books_by_ids(db: AsyncSession, book_ids: List[int]) -> dict:
+    """Books for `book_ids` keyed by id; ids that do not exist are absent.
+
+    Cached books are served from the cache and the rest are read with
+    one query, then cached like single reads.
+    """
+    found = {}
+    uncached = []
+    for book_id in book_ids:
+        cached = _cache_get(db, _book_key(book_id))
+        if cached is None:
+            uncached.append(book_id)
+        else:
+            found[book_id] = cached
+    if not uncached:
+        return found
+
+    if dialect_name(db) == "postgresql":
+        query = text("SELECT * FROM books WHERE id = ANY(:ids)")
+        chunks = [uncached]
+    else:
+        query = text("SELECT * FROM books WHERE id IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        chunks = [
+            uncached[start:start + BULK_BATCH_SIZE]
+            for start in range(0, len(uncached), BULK_BATCH_SIZE)
+        ]
+    for chunk in chunks:
+        result = await db.execute(query, {"ids": chunk})
+        for row in result.mappings():
+            book = dict(row)
+            _cache_set(db, _book_key(book["id"]), book)
+            found[book["id"]] = book
+    return found
+
+
+async def get_book_version(db: AsyncSession, book_id: int):
+    cached = _cache_get(db, _book_key(book_id))
+    if cached is not None:
+        return cached["version"]
+
+    query = text("SELECT version FROM books WHERE id = :id")
+    result = await db.execute(query, {"id": book_id})
+    return result.scalar()
+
+
+@lru_cache(maxsize=None)
+def update_statement(columns: tuple[str, ...]) -> TextClause:
+    set_clause = ", ".join([f"{k} = :{k}" for k in columns])
+    return text(
         f"""
         UPDATE books
-        SET {set_clause}
+        SET {set_clause}, version = version + 1
         WHERE id = :id
         RETURNING id, title, genre, published_year, author_id
     """
     )
-    result = await db.execute(query, fields)
+
+
+def _stats_filter_sql(shape: BooksQueryShape) -> str:
+    query = " WHERE book_count > 0"
+    if shape.genre:
+        query += " AND genre = :genre"
+    if shape.year_from:
+        query += " AND published_year >= :year_from"
+    if shape.year_to:
+        query += " AND published_year <= :year_to"
+    return query
+
+
+def _top_authors_sql(counts: str) -> str:
+    return (
+        "SELECT t.author_id, authors.name, t.n FROM (" + counts
+        + " GROUP BY author_id ORDER BY n DESC, author_id"
+        " LIMIT :authors_limit) AS t"
+        " JOIN authors ON authors.id = t.author_id"
+        " ORDER BY t.n DESC, t.author_id"
+    )
+
+
+@lru_cache(maxsize=None)
+def facet_statements(
+    shape: BooksQueryShape,
+) -> tuple[TextClause, TextClause, TextClause]:
+    """(genres, decades, authors) statements for a filter shape.
+
+    Genre and year filters are answered from the summary tables. Title
+    and full-text filters cannot be, so those shapes aggregate the
+    matching books directly; so does the author facet under a year
+    filter, as author counts are not kept per year.
+    """
+    decade = "(published_year / 10) * 10"
+    if shape.title or shape.search:
+        source = (
+            "SELECT {key} AS value, COUNT(*) AS n"
+            + _books_filter_sql(shape)
+            + " GROUP BY {key} ORDER BY value"
+        )
+    else:
+        source = (
+            "SELECT {key} AS value, SUM(book_count) AS n"
+            " FROM book_genre_year_counts" + _stats_filter_sql(shape)
+            + " GROUP BY {key} ORDER BY value"
+        )
+
+    if shape.title or shape.search or shape.year_from or shape.year_to:
+        author_counts = (
+            "SELECT author_id, COUNT(*) AS n" + _books_filter_sql(shape)
+            + " AND author_id IS NOT NULL"
+        )
+    else:
+        author_counts = (
+            "SELECT author_id, SUM(book_count) AS n"
+            " FROM author_genre_counts" + _stats_filter_sql(shape)
+        )
+
+    return (
+        text(source.format(key="genre")),
+        text(source.format(key=decade)),
+        text(_top_authors_sql(author_counts)),
+    )
+
+
+async def get_book_facets(
+    db: AsyncSession,
+    title: str = None,
+    genre: str = None,
+    year_from: int = None,
+    year_to: int = None,
+    q: str = None,
+    authors_limit: int = 10,
+) -> dict:
+    key = make_key(
+        BOOK_FACETS_PREFIX,
+        v=book_cache.get_version(BOOK_LIST_NAMESPACE),
+        title=title.lower() if title else None,
+        q=" ".join(_search_terms(q)) if q else None,
+        genre=genre,
+        year_from=year_from,
+        year_to=year_to,
+        authors_limit=authors_limit,
+    )
+    cached = _cache_get(db, key)
+    if cached is not None:
+        return cached
+
+    shape, params = books_query_shape(
+        dialect_name(db), title, genre, year_from, year_to, None, q=q
+    )
+    shape = _count_shape(shape)
+    params = {k: params[k] for k in COUNT_FILTER_PARAMS if k in params}
+    params["authors_limit"] = authors_limit
+    _count_statement(shape.label.replace("books.list", "books.facets", 1))
+
+    genres, decades, authors = facet_statements(shape)
+    genre_rows = (await db.execute(genres, params)).all()
+    decade_rows = (await db.execute(decades, params)).all()
+    author_rows = (await db.execute(authors, params)).all()
+    facets = {
+        "total": sum(n for _, n in genre_rows),
+        "genres": [{"value": v, "count": n} for v, n in genre_rows],
+        "decades": [{"value": v, "count": n} for v, n in decade_rows],
+        "authors": [
+            {"author_id": author_id, "name": name, "count": n}
+            for author_id, name, n in author_rows
+        ],
+    }
+    _cache_set(db, key, facets)
+    return facets
+
+
+async def _locked_stats_row(db: AsyncSession, book_id: int):
+    # The summary buckets a book is counted in before an update. Locked
+    # on PostgreSQL so a concurrent update cannot move it in between.
+    query = "SELECT genre, published_year, author_id FROM books WHERE id = :id"
+    if dialect_name(db) == "postgresql":
+        query += " FOR UPDATE"
+    result = await db.execute(text(query), {"id": book_id})
+    return result.mappings().first()
+
+
+async def update_book(db: AsyncSession, book_id: int, book_data: BookUpdate):
+    fields = book_data.model_dump(exclude_unset=True)
+    if not fields:
+        return None
+
+    # Schema order, so {"genre", "title"} and {"title", "genre"} share one
+    # statement; at most 15 shapes exist.
+    columns = tuple(
+        name for name in BookUpdate.model_fields if name in fields
+    )
+    fields["id"] = book_id
+
+    old = None
+    if STATS_COLUMNS.intersection(columns):
+        old = await _locked_stats_row(db, book_id)
+
+    _count_statement("books.update:" + "+".join(columns))
+    try:
+        result = await db.execute(update_statement(columns), fields)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Book update conflicts with an existing book or author"
+        )
     row = result.mappings().first()
+    if row and old:
+        await apply_book_deltas(db, removed=[old], added=[row])
     await db.commit()
+    if row:
+        _invalidate_books(book_id)
     return row
 
 
@@ -107,51 +837,96 @@ async def delete_book(db: AsyncSession, book_id: int):
         """
         DELETE FROM books
         WHERE id = :id
-        RETURNING id
+        RETURNING id, genre, published_year, author_id
     """
     )
     result = await db.execute(query, {"id": book_id})
     row = result.mappings().first()
+    if row:
+        await apply_book_deltas(db, removed=[row])
     await db.commit()
+    if row:
+        _invalidate_books(book_id)
     return row
 
 
+async def _missing_author_ids(db: AsyncSession, author_ids: set) -> set:
+    ids = list(author_ids)
+    if dialect_name(db) == "postgresql":
+        query = text("SELECT id FROM authors WHERE id = ANY(:ids)")
+        result = await db.execute(query, {"ids": ids})
+        return author_ids - set(result.scalars().all())
+
+    query = text("SELECT id FROM authors WHERE id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+    found = set()
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        chunk = ids[start:start + BULK_BATCH_SIZE]
+        result = await db.execute(query, {"ids": chunk})
+        found.update(result.scalars().all())
+    return author_ids - found
+
+
 async def bulk_import_books(db: AsyncSession, books: List[BookCreate]):
-    results = []
+    missing = await _missing_author_ids(db, {b.author_id for b in books})
+    if missing:
+        first_missing = next(
+            b.author_id for b in books if b.author_id in missing
+        )
+        raise HTTPException(
+            status_code=400,
+            detail=f"Author with id {first_missing} does not exist",
+        )
+
+    # Later duplicates inside the upload resolve to the first occurrence,
+    # the same as a duplicate of a row that already exists in the table.
+    unique_books = {}
     for book in books:
-        check_author = text("SELECT id FROM authors WHERE id = :id")
-        author = await db.execute(check_author, {"id": book.author_id})
-        if not author.mappings().first():
-            raise HTTPException(
-                status_code=400,
-                detail=f"Author with id {book.author_id} does not exist",
-            )
+        unique_books.setdefault((book.title, book.author_id), book)
 
-        check_query = text(
-            """
-            SELECT id, title, genre, published_year, author_id
-            FROM books
-            WHERE title = :title AND author_id = :author_id
-        """
-        )
-        existing = await db.execute(
-            check_query, {"title": book.title, "author_id": book.author_id}
+    table = Book.__table__
+    columns = [
+        table.c.id,
+        table.c.title,
+        table.c.genre,
+        table.c.published_year,
+        table.c.author_id,
+    ]
+    rows_by_key = {}
+    inserted = []
+    pending = list(unique_books.values())
+    for start in range(0, len(pending), BULK_BATCH_SIZE):
+        batch = pending[start:start + BULK_BATCH_SIZE]
+        insert_stmt = (
+            upsert_insert(db, table)
+            .values([book.model_dump(mode="json") for book in batch])
+            .on_conflict_do_nothing(index_elements=["title", "author_id"])
+            .returning(*columns)
         )
-        row = existing.mappings().first()
+        result = await db.execute(insert_stmt)
+        for row in result.mappings():
+            rows_by_key[(row["title"], row["author_id"])] = dict(row)
+            inserted.append(row)
 
-        if row:
-            results.append(row)
-        else:
-            insert_query = text(
-                """
-                INSERT INTO books (title, genre, published_year, author_id)
-                VALUES (:title, :genre, :published_year, :author_id)
-                RETURNING id, title, genre, published_year, author_id
-            """
+        existing_keys = [
+            (book.title, book.author_id)
+            for book in batch
+            if (book.title, book.author_id) not in rows_by_key
+        ]
+        if existing_keys:
+            existing = await db.execute(
+                select(*columns).where(
+                    tuple_(table.c.title, table.c.author_id).in_(
+                        existing_keys
+                    )
+                )
             )
-            result = await db.execute(insert_query, book.dict())
-            row = result.mappings().first()
-            results.append(row)
+            for row in existing.mappings():
+                rows_by_key[(row["title"], row["author_id"])] = dict(row)
 
+    await apply_book_deltas(db, added=inserted)
     await db.commit()
-    return results
+    if inserted:
+        _invalidate_books()
+    return [rows_by_key[(b.title, b.author_id)] for b in books]
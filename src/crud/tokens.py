@@ -0,0 +1,103 @@
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.jwt_handler import forget_token, token_claims, token_id
+from src.core.config import env_float
+
+# Every worker keeps the unexpired revocations in memory, so checking a
+# token costs no query. It reads the rows added since its last look at
+# most this often, which bounds how long a token revoked through another
+# worker is still accepted here.
+REVOCATION_SYNC_SECONDS = env_float("REVOCATION_SYNC_SECONDS", 1.0)
+# Each sync reads again the rows stamped up to this many seconds before
+# the newest one seen, so a revocation that commits late, or comes from
+# a worker whose clock lags, is not skipped.
+REVOCATION_SYNC_OVERLAP = 60
+
+REVOKE = text(
+    "INSERT INTO revoked_tokens (jti, expires_at, revoked_at)"
+    " VALUES (:jti, :exp, :now)"
+    " ON CONFLICT (jti) DO NOTHING"
+)
+PURGE_EXPIRED = text("DELETE FROM revoked_tokens WHERE expires_at <= :now")
+REVOKED_SINCE = text(
+    "SELECT jti, expires_at, revoked_at FROM revoked_tokens"
+    " WHERE revoked_at >= :since AND expires_at > :now"
+)
+
+
+class RevocationList:
+    """This worker's copy of the revoked_tokens table."""
+
+    def __init__(
+        self, interval: float = REVOCATION_SYNC_SECONDS, clock=time.monotonic
+    ):
+        self.interval = interval
+        self.clock = clock
+        self.clear()
+
+    def clear(self) -> None:
+        # jti -> exp; an entry is only dropped once its token expired.
+        self._revoked = {}
+        self._newest = None
+        self._synced_at = None
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def add(self, jti: str, exp: int) -> None:
+        self._revoked[jti] = exp
+
+    def due(self) -> bool:
+        return (
+            self._synced_at is None
+            or self.clock() - self._synced_at >= self.interval
+        )
+
+    async def sync(self, db: AsyncSession) -> None:
+        # Set first, so concurrent requests do not all sync at once.
+        self._synced_at = self.clock()
+        now = int(time.time())
+        since = -1
+        if self._newest is not None:
+            since = self._newest - REVOCATION_SYNC_OVERLAP
+        result = await db.execute(REVOKED_SINCE, {"since": since, "now": now})
+        for jti, exp, revoked_at in result.all():
+            self._revoked[jti] = exp
+            if self._newest is None or revoked_at > self._newest:
+                self._newest = revoked_at
+        self._revoked = {
+            jti: exp for jti, exp in self._revoked.items() if exp > now
+        }
+
+
+revocations = RevocationList()
+
+
+async def revoke_token(db: AsyncSession, token: str) -> None:
+    """Reject `token` on every worker from now until it expires."""
+    forget_token(token)
+    payload = token_claims(token)
+    if payload is None:
+        # Invalid or expired tokens are rejected anyway.
+        return
+    # A token without exp never expires, so neither does its entry.
+    exp = payload.get("exp", 2**31 - 1)
+    jti = token_id(token, payload)
+    now = int(time.time())
+    await db.execute(PURGE_EXPIRED, {"now": now})
+    await db.execute(REVOKE, {"jti": jti, "exp": exp, "now": now})
+    await db.commit()
+    revocations.add(jti, exp)
+
+
+async def ensure_not_revoked(
+    db: AsyncSession, token: str, payload: dict
+) -> None:
+    if revocations.due():
+        await revocations.sync(db)
+    if token_id(token, payload) in revocations:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
@@ -1,10 +1,27 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from passlib.context import CryptContext
+from src.core.config import env_int
 from src.db.models import User
 from src.schemas.user import UserCreate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = env_int("BCRYPT_ROUNDS", 12)
+# At most this many bcrypt calls run at once; the rest queue up instead
+# of blocking the event loop or starving the default threadpool.
+PASSWORD_HASH_WORKERS = env_int("PASSWORD_HASH_WORKERS", 4)
+
+# Hashes made with a different cost factor are reported as needing an
+# update, so logins rehash them with the current BCRYPT_ROUNDS.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
 
 
 def hash_password(password: str) -> str:
@@ -15,10 +32,30 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def _run_in_password_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, partial(func, *args)
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_password_executor(hash_password, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Return (valid, new_hash); new_hash is set when a rehash is due."""
+    return await _run_in_password_executor(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     new_user = User(
         email=user.email,
-        hashed_password=hash_password(user.password),
+        hashed_password=await hash_password_async(user.password),
         role="user"
     )
     db.add(new_user)
@@ -30,3 +67,22 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     result = await db.execute(select(User).where(User.email == email))
     return result.scalar_one_or_none()
+
+
+async def authenticate_user(
+    db: AsyncSession, email: str, password: str
+) -> User | None:
+    db_user = await get_user_by_email(db, email)
+    if not db_user:
+        return None
+
+    valid, new_hash = await verify_and_update_password(
+        password, db_user.hashed_password
+    )
+    if not valid:
+        return None
+
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+    return db_user
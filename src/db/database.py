@@ -1,34 +1,87 @@
-import os
-from dotenv import load_dotenv
+import logging
+
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-load_dotenv()
+from src.core.config import DatabaseSettings
+from src.db.replicas import (
+    FRESH_READ,
+    REPLICA_SESSION,
+    ReadRouter,
+    Replica,
+    wants_primary,
+)
+
+logger = logging.getLogger(__name__)
+
+settings = DatabaseSettings.from_env()
 
-DATABASE_USER = os.getenv("DATABASE_USER")
-DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD")
-DATABASE_HOST = os.getenv("DATABASE_HOST")
-DATABASE_PORT = os.getenv("DATABASE_PORT")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
+SQLALCHEMY_DATABASE_URL = settings.url
 
-SQLALCHEMY_DATABASE_URL = (
-    f"postgresql+asyncpg://{DATABASE_USER}:"
-    f"{DATABASE_PASSWORD}@{DATABASE_HOST}:"
-    f"{DATABASE_PORT}/{DATABASE_NAME}"
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL, **settings.engine_kwargs()
 )
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=True, future=True)
 
-SessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-    future=True,
+def _sessionmaker(bind):
+    return sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+        future=True,
+    )
+
+
+SessionLocal = _sessionmaker(engine)
+
+replica_engines = {
+    f"replica{index}": create_async_engine(
+        replica.url, **replica.engine_kwargs()
+    )
+    for index, replica in enumerate(settings.replica_settings(), start=1)
+}
+
+read_router = ReadRouter(
+    SessionLocal,
+    [
+        Replica(name, replica_engine, _sessionmaker(replica_engine))
+        for name, replica_engine in replica_engines.items()
+    ],
 )
 
 
+def log_pool_configuration() -> None:
+    logger.info(
+        "Database engine %s://%s pool=%s %s",
+        engine.url.get_backend_name(),
+        engine.url.host or engine.url.database,
+        type(engine.pool).__name__,
+        settings.describe(),
+    )
+    for name, replica_engine in replica_engines.items():
+        logger.info(
+            "Read replica %s %s://%s",
+            name,
+            replica_engine.url.get_backend_name(),
+            replica_engine.url.host or replica_engine.url.database,
+        )
+
+
 async def get_db():
     async with SessionLocal() as session:
         yield session
+
+
+async def get_read_db(request: Request):
+    """Session for read-only routes: a replica when one is healthy."""
+    prefer_primary = bool(read_router.replicas) and wants_primary(
+        request.headers.get("cookie")
+    )
+    sessions = read_router.sessions(prefer_primary)
+    async with sessions() as session:
+        session.info[FRESH_READ] = prefer_primary
+        session.info[REPLICA_SESSION] = sessions is not read_router.primary
+        yield session
@@ -0,0 +1,185 @@
+"""Per-request SQL counts and timings, and a slow-query log.
+
+instrument_engine() hooks the cursor events of an engine. Queries run
+while a track_queries() block is active are added to its QueryStats;
+QueryTimingMiddleware opens one per request, reports it in a
+Server-Timing header and logs a summary line for every request.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+from src.core.config import env_float
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their parameters;
+# 0 logs every statement, a negative value turns the log off.
+SLOW_QUERY_MS = env_float("SLOW_QUERY_MS", 200.0)
+MAX_LOGGED_PARAMS = 500
+SECRET_PARAM = re.compile(r"password|secret|token", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    # Only filled when created with record=True, e.g. by tests.
+    statements: list = field(default_factory=list)
+    record: bool = False
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000
+
+
+# Every active track_queries() block, outermost first, so a test that
+# wraps a request sees the same queries as the request itself.
+_active: ContextVar[tuple] = ContextVar("active_query_stats", default=())
+
+
+@contextmanager
+def track_queries(record: bool = False):
+    stats = QueryStats(record=record)
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+def statement_shape(statement: str) -> str:
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+def _redact(params):
+    if isinstance(params, dict):
+        return {
+            key: "***" if SECRET_PARAM.search(str(key)) else value
+            for key, value in params.items()
+        }
+    return params
+
+
+def format_params(context, parameters) -> str:
+    # The named parameters, where there are any, rather than the
+    # driver's positional ones, so secrets can be recognised by name.
+    rows = getattr(context, "compiled_parameters", None) or [parameters]
+    if len(rows) == 1:
+        text = repr(_redact(rows[0]))
+    else:
+        text = f"{len(rows)} rows, first {_redact(rows[0])!r}"
+    if len(text) > MAX_LOGGED_PARAMS:
+        text = text[:MAX_LOGGED_PARAMS] + "..."
+    return text
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    for stats in _active.get():
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.record:
+            stats.statements.append(statement_shape(statement))
+
+    if 0 <= SLOW_QUERY_MS <= elapsed * 1000:
+        logger.warning(
+            "slow query %.1fms: %s params=%s",
+            elapsed * 1000,
+            statement_shape(statement),
+            format_params(context, parameters),
+            extra={
+                "duration_ms": round(elapsed * 1000, 3),
+                "statement": statement_shape(statement),
+            },
+        )
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute.
+    conn = context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(
+        sync_engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class QueryTimingMiddleware:
+    """Add `Server-Timing: db;dur=<ms>;desc="<n> queries"` to responses.
+
+    The header goes out with the response start, so for streamed
+    responses it covers the queries run before the first chunk; the log
+    line written when the response is finished covers all of them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        with track_queries() as stats:
+
+            async def send_with_timing(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    timing = (
+                        f'db;dur={stats.milliseconds:.1f};'
+                        f'desc="{stats.count} queries"'
+                    )
+                    message["headers"] = list(message.get("headers", []))
+                    message["headers"].append(
+                        (b"server-timing", timing.encode())
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                duration_ms = (time.perf_counter() - start) * 1000
+                logger.info(
+                    "%s %s status=%d queries=%d db_ms=%.1f duration_ms=%.1f",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    stats.count,
+                    stats.milliseconds,
+                    duration_ms,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "queries": stats.count,
+                        "db_ms": round(stats.milliseconds, 3),
+                        "duration_ms": round(duration_ms, 3),
+                    },
+                )
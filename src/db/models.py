@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    ForeignKey,
+    Index,
+    DDL,
+    event,
+    text,
+)
 from sqlalchemy.orm import relationship, declarative_base
 from enum import Enum
 
@@ -12,13 +21,33 @@ class GenreEnum(str, Enum):
     history = "History"
 
 
+def _lower_name(context):
+    return context.get_current_parameters()["name"].lower()
+
+
 class Author(Base):
     __tablename__ = "authors"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
+    # Lowercased in Python on insert, like the prefix it is searched
+    # with; SQLite's lower() only folds ASCII letters.
+    name_lower = Column(String, default=_lower_name)
+
+    # Never lazy-load in async code: embed authors with a JOIN instead
+    # (see ?include=author in crud.books).
+    books = relationship("Book", back_populates="author", lazy="raise")
 
-    books = relationship("Book", back_populates="author")
+    __table_args__ = (
+        # Case-insensitive name prefix search on GET /authors.
+        Index(
+            "ix_authors_name_lower_prefix",
+            text("name_lower text_pattern_ops"),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_authors_name_lower", "name_lower"
+        ).ddl_if(dialect="sqlite"),
+    )
 
 
 class Book(Base):
@@ -28,9 +57,119 @@ class Book(Base):
     title = Column(String, nullable=False)
     genre = Column(String, nullable=False)
     published_year = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     author_id = Column(Integer, ForeignKey("authors.id"))
-    author = relationship("Author", back_populates="books")
+    author = relationship("Author", back_populates="books", lazy="raise")
+
+    __table_args__ = (
+        # A book is identified by its title within an author's catalogue;
+        # the bulk importer relies on this for ON CONFLICT.
+        Index(
+            "ux_books_title_author_id", "title", "author_id", unique=True
+        ),
+        # One (key, id) index per sort_by option, with and without the
+        # genre equality filter in front, so every ORDER BY ..., id that
+        # get_books emits (and its keyset seek) is an index walk. Year
+        # range scans read the most rows, so those indexes also cover the
+        # remaining columns for index-only scans on PostgreSQL.
+        Index("ix_books_title_id", "title", "id"),
+        Index(
+            "ix_books_published_year_id",
+            "published_year",
+            "id",
+            postgresql_include=["title", "genre", "author_id"],
+        ),
+        Index("ix_books_author_id_id", "author_id", "id"),
+        Index("ix_books_genre_id", "genre", "id"),
+        Index("ix_books_genre_title_id", "genre", "title", "id"),
+        Index(
+            "ix_books_genre_published_year_id",
+            "genre",
+            "published_year",
+            "id",
+            postgresql_include=["title", "author_id"],
+        ),
+        Index("ix_books_genre_author_id_id", "genre", "author_id", "id"),
+        # Serves `title ILIKE '%...%'` (requires the pg_trgm extension).
+        Index(
+            "ix_books_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Serves the ranked `q=` full-text search.
+        Index(
+            "ix_books_title_tsv",
+            text("to_tsvector('english', title)"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# Book counts kept up to date by the book writes in src/crud, so
+# /books/facets aggregates a few hundred summary rows instead of the books
+# table. src/crud/book_stats.py rebuilds them from scratch.
+class BookGenreYearCount(Base):
+    __tablename__ = "book_genre_year_counts"
+
+    genre = Column(String, primary_key=True)
+    published_year = Column(Integer, primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+
+
+class AuthorGenreCount(Base):
+    __tablename__ = "author_genre_counts"
+
+    author_id = Column(Integer, primary_key=True)
+    genre = Column(String, primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+
+
+# SQLite has no trigram/tsvector indexes, so the same searches are served
+# by two external-content FTS5 tables kept in sync with triggers:
+# `books_trgm` for substring matches and `books_fts` for ranked search.
+SQLITE_SEARCH_TABLES = {
+    "books_trgm": "trigram",
+    "books_fts": "porter unicode61",
+}
+
+
+def sqlite_search_ddl() -> list[str]:
+    statements = []
+    for table, tokenizer in SQLITE_SEARCH_TABLES.items():
+        statements += [
+            f"CREATE VIRTUAL TABLE {table} USING fts5("
+            f"title, content='books', content_rowid='id', "
+            f"tokenize='{tokenizer}')",
+            f"CREATE TRIGGER {table}_ai AFTER INSERT ON books BEGIN "
+            f"INSERT INTO {table}(rowid, title) "
+            f"VALUES (new.id, new.title); END",
+            f"CREATE TRIGGER {table}_ad AFTER DELETE ON books BEGIN "
+            f"INSERT INTO {table}({table}, rowid, title) "
+            f"VALUES ('delete', old.id, old.title); END",
+            f"CREATE TRIGGER {table}_au AFTER UPDATE OF title ON books BEGIN "
+            f"INSERT INTO {table}({table}, rowid, title) "
+            f"VALUES ('delete', old.id, old.title); "
+            f"INSERT INTO {table}(rowid, title) "
+            f"VALUES (new.id, new.title); END",
+        ]
+    return statements
+
+
+for _statement in sqlite_search_ddl():
+    event.listen(
+        Book.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+
+for _table in SQLITE_SEARCH_TABLES:
+    event.listen(
+        Book.__table__,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_table}").execute_if(dialect="sqlite"),
+    )
 
 
 class User(Base):
@@ -40,3 +179,16 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(String, nullable=False, default="user")
+
+
+class RevokedToken(Base):
+    """JWTs rejected by every worker until their own `exp`."""
+
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    # The token's exp (Unix seconds); rows past it are purged.
+    expires_at = Column(Integer, nullable=False, index=True)
+    # When it was revoked (Unix seconds); workers sync rows added since
+    # their last look.
+    revoked_at = Column(Integer, nullable=False, index=True, default=0)
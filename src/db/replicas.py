@@ -0,0 +1,225 @@
+"""Route read-only requests to read replicas.
+
+ReadRouter hands out the session factory for a read: replicas take
+turns, and a replica that fails a health check, lags too far behind or
+drops a connection is skipped until a later check passes. Without a
+healthy replica (or without replicas at all) reads go to the primary.
+
+ReadYourWritesMiddleware gives a client that has just written a short
+cookie window in which its reads also go to the primary, so it does not
+read its own writes back from a replica that has not replayed them yet.
+"""
+import asyncio
+import logging
+import time
+from functools import partial
+from http.cookies import CookieError, SimpleCookie
+from itertools import count
+
+from sqlalchemy import event, text
+
+from src.core.config import env_float
+
+logger = logging.getLogger(__name__)
+
+# Seconds between health checks, and the timeout of each check.
+REPLICA_CHECK_INTERVAL = env_float("REPLICA_CHECK_INTERVAL", 5.0)
+# A PostgreSQL replica further behind than this is skipped.
+REPLICA_MAX_LAG_SECONDS = env_float("REPLICA_MAX_LAG_SECONDS", 5.0)
+# Reads go to the primary for this long after the client's last write;
+# 0 turns the cookie off.
+READ_YOUR_WRITES_SECONDS = env_float("READ_YOUR_WRITES_SECONDS", 5.0)
+READ_PRIMARY_COOKIE = "read_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Session.info flags set by get_read_db and honoured by the crud caches.
+REPLICA_SESSION = "replica"
+FRESH_READ = "fresh_read"
+
+# time.monotonic() of this worker's last write; see may_fill_cache.
+_last_write = float("-inf")
+
+# Seconds of WAL not replayed yet; 0 when the replica has replayed
+# everything it received, however long ago the last write was.
+PG_REPLICA_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+    " END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine, sessions):
+        self.name = name
+        self.engine = engine
+        self.sessions = sessions
+        self.healthy = True
+        self.lag = None
+
+
+class ReadRouter:
+    def __init__(
+        self,
+        primary,
+        replicas=(),
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+        check_timeout: float = REPLICA_CHECK_INTERVAL,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_timeout = check_timeout
+        self._turn = count()
+        for replica in self.replicas:
+            event.listen(
+                replica.engine.sync_engine,
+                "handle_error",
+                partial(self._on_error, replica),
+            )
+
+    def sessions(self, prefer_primary: bool = False):
+        """Session factory for the next read."""
+        if prefer_primary or not self.replicas:
+            return self.primary
+        start = next(self._turn)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica.sessions
+        return self.primary
+
+    def _set_health(self, replica: Replica, healthy: bool, reason=""):
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info("replica %s is back in rotation", replica.name)
+            else:
+                logger.warning(
+                    "replica %s taken out of rotation: %s",
+                    replica.name,
+                    reason,
+                )
+        replica.healthy = healthy
+
+    def _on_error(self, replica: Replica, context) -> None:
+        # A failed connect or a dropped connection takes the replica out
+        # at once instead of waiting for the next check.
+        if context.connection is None or context.is_disconnect:
+            self._set_health(replica, False, context.original_exception)
+
+    async def _probe(self, replica: Replica):
+        async with replica.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                return (await conn.execute(PG_REPLICA_LAG)).scalar()
+            await conn.execute(text("SELECT 1"))
+            return None
+
+    async def check(self, replica: Replica) -> bool:
+        try:
+            lag = await asyncio.wait_for(
+                self._probe(replica), self.check_timeout
+            )
+        except Exception as exc:
+            self._set_health(replica, False, repr(exc))
+            return False
+        replica.lag = lag
+        if lag is not None and lag > self.max_lag:
+            self._set_health(replica, False, f"{lag:.1f}s behind")
+            return False
+        self._set_health(replica, True)
+        return True
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(r) for r in self.replicas))
+
+    async def run_health_checks(self, interval: float) -> None:
+        while True:
+            await self.check_all()
+            await asyncio.sleep(interval)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def may_read_cache(session) -> bool:
+    # A client inside its read-your-writes window must not be answered
+    # from a cache another client may have filled from a replica.
+    return not session.info.get(FRESH_READ)
+
+
+def note_write() -> None:
+    """Record that this worker changed rows the caches hold."""
+    global _last_write
+    _last_write = time.monotonic()
+
+
+def may_fill_cache(session) -> bool:
+    # A replica in rotation was at most REPLICA_MAX_LAG_SECONDS behind at
+    # its last check, so its results may predate a more recent write, and
+    # cached they would outlive the replica catching up. A write while
+    # the query ran blocks the fill too.
+    if not session.info.get(REPLICA_SESSION):
+        return True
+    return time.monotonic() - _last_write >= REPLICA_MAX_LAG_SECONDS
+
+
+def wants_primary(
+    cookie_header: str | None, window: float = READ_YOUR_WRITES_SECONDS
+) -> bool:
+    """True while the read-your-writes cookie of a request is live."""
+    if not cookie_header or READ_PRIMARY_COOKIE not in cookie_header:
+        return False
+    cookie = SimpleCookie()
+    try:
+        cookie.load(cookie_header)
+        until = float(cookie[READ_PRIMARY_COOKIE].value)
+    except (CookieError, KeyError, ValueError):
+        return False
+    now = time.time()
+    # Clients can set the cookie themselves, so a far-off deadline is
+    # not honoured.
+    return now < until <= now + window
+
+
+class ReadYourWritesMiddleware:
+    """Set the read-your-writes cookie on every successful write.
+
+    Any request with an unsafe method counts as a write, except those to
+    `read_only_paths` (reads sent as POST because of their body).
+    """
+
+    def __init__(
+        self,
+        app,
+        window: float = READ_YOUR_WRITES_SECONDS,
+        read_only_paths=(),
+    ):
+        self.app = app
+        self.window = window
+        self.read_only_paths = frozenset(read_only_paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or scope["path"] in self.read_only_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+            ):
+                until = time.time() + self.window
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}={until:.3f}; "
+                    f"Max-Age={int(self.window) + 1}; Path=/; "
+                    "HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", []))
+                message["headers"].append((b"set-cookie", cookie.encode()))
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
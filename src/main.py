@@ -1,13 +1,67 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 
 from src.routes import user, authors, books
+from src.core.config import env_str
 from src.core.limiter import limiter
+from src.core.metrics import (
+    METRICS_ENABLED,
+    METRICS_PATH,
+    MetricsMiddleware,
+    instrument_cache,
+    instrument_pool,
+    mark_process_dead,
+    rate_limit_exceeded_handler,
+    render_metrics,
+)
+from src.auth.jwt_handler import token_cache
+from src.crud.books import book_cache
+from src.db.database import (
+    engine,
+    log_pool_configuration,
+    read_router,
+    replica_engines,
+)
+from src.db.instrumentation import QueryTimingMiddleware, instrument_engine
+from src.db.replicas import (
+    READ_YOUR_WRITES_SECONDS,
+    REPLICA_CHECK_INTERVAL,
+    ReadYourWritesMiddleware,
+)
+
+logging.basicConfig(
+    level=env_str("LOG_LEVEL", "INFO"),
+    format="%(levelname)s:     %(name)s - %(message)s",
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_pool_configuration()
+    health_checks = None
+    if read_router.replicas:
+        health_checks = asyncio.create_task(
+            read_router.run_health_checks(REPLICA_CHECK_INTERVAL)
+        )
+    yield
+    if health_checks is not None:
+        health_checks.cancel()
+        with suppress(asyncio.CancelledError):
+            await health_checks
+    await read_router.dispose()
+    await engine.dispose()
+    mark_process_dead()
+
 
-app = FastAPI(title="Book Management System", version="1.0.0")
+app = FastAPI(
+    title="Book Management System", version="1.0.0", lifespan=lifespan
+)
 
 
 @app.get("/")
@@ -18,7 +72,32 @@ async def root():
 
 
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+app.add_middleware(QueryTimingMiddleware)
+instrument_engine(engine)
+for replica_engine in replica_engines.values():
+    instrument_engine(replica_engine)
+if replica_engines and READ_YOUR_WRITES_SECONDS > 0:
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        window=READ_YOUR_WRITES_SECONDS,
+        read_only_paths={"/books/batch"},
+    )
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, router=app.router)
+    instrument_pool(engine)
+    instrument_cache(book_cache, "books")
+    instrument_cache(token_cache, "tokens")
+    for name, replica_engine in replica_engines.items():
+        instrument_pool(replica_engine, name)
+
+    @app.get(METRICS_PATH, include_in_schema=False)
+    def metrics():
+        content, media_type = render_metrics()
+        return Response(content, media_type=media_type)
+
 
 app.include_router(user.router)
 app.include_router(authors.router)
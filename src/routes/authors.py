@@ -4,18 +4,26 @@ from fastapi import (
     UploadFile,
     File,
     HTTPException,
+    Query,
     Request
 )
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.database import get_db
+from src.db.database import get_db, get_read_db
 from src.crud import authors
-from src.schemas.author import AuthorCreate, AuthorOut
-from typing import List
+from src.schemas.author import AuthorCreate, AuthorOut, AuthorListOut
+from src.schemas.ingest import BulkImportProgress
+from typing import List, Optional
 import json
 from src.core.limiter import limiter
+from src.core.etag import make_etag, etag_matches, not_modified
+from src.core.pagination import encode_cursor, decode_cursor
+from src.core.ingest import ingest_upload
 
 
-router = APIRouter(prefix="/authors", tags=["Authors"])
+router = APIRouter(
+    prefix="/authors", tags=["Authors"], default_response_class=ORJSONResponse
+)
 
 
 @router.post("/", response_model=AuthorOut)
@@ -26,10 +34,46 @@ async def create_author(
     return await authors.create_author(db, author)
 
 
-@router.get("/", response_model=List[AuthorOut])
+@router.get(
+    "/",
+    response_model=List[AuthorListOut],
+    response_model_exclude_none=True
+)
 @limiter.limit("10/minute")
-async def read_authors(request: Request, db: AsyncSession = Depends(get_db)):
-    return await authors.get_authors(db)
+async def read_authors(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    name: Optional[str] = Query(
+        None, min_length=1, description="Case-insensitive name prefix"
+    ),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    with_book_count: bool = Query(False),
+):
+    after_id = None
+    if cursor:
+        _, after_id = decode_cursor(cursor, "id", "asc")
+
+    authors_list = await authors.get_authors(
+        db,
+        limit=limit,
+        after_id=after_id,
+        name_prefix=name,
+        with_book_count=with_book_count
+    )
+    etag = make_etag("authors", [tuple(row) for row in authors_list])
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    headers = {"ETag": etag}
+    if len(authors_list) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(
+            "id", "asc", authors_list[-1]._mapping
+        )
+    # The selected columns are exactly the AuthorListOut fields.
+    return ORJSONResponse(
+        [dict(row._mapping) for row in authors_list], headers=headers
+    )
 
 
 @router.post("/bulk", response_model=List[AuthorOut])
@@ -50,3 +94,15 @@ async def bulk_import_authors(
 
     authors_list = [AuthorCreate(**item) for item in data]
     return await authors.bulk_import_authors(db, authors_list)
+
+
+@router.post("/bulk/stream", response_model=BulkImportProgress)
+async def bulk_import_authors_stream(
+    db: AsyncSession = Depends(get_db),
+    file: UploadFile = File(...),
+    chunk_size: int = Query(1000, ge=1, le=10000),
+):
+    async def importer(items):
+        await authors.bulk_import_authors(db, items)
+
+    return await ingest_upload(file, AuthorCreate, importer, chunk_size)
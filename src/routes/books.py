@@ -5,23 +5,63 @@ from fastapi import (
     Query,
     File,
     UploadFile,
-    Request
+    Request,
+    Response
 )
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.database import get_db
+from src.db.database import get_db, get_read_db
 from src.crud import books
-from src.schemas.book import BookCreate, BookOut, BookUpdate
-from typing import List, Optional, Literal
+from src.schemas.book import (
+    BookBatch,
+    BookBatchRequest,
+    BookCreate,
+    BookFacets,
+    BookOut,
+    BookUpdate,
+    BookWithAuthorOut,
+)
+from src.schemas.ingest import BulkImportProgress
+from typing import List, Optional, Literal, Union
 import json
 from src.auth.dependencies import get_current_user
 from src.core.limiter import limiter
-from fastapi.responses import JSONResponse, StreamingResponse
+from src.core.pagination import encode_cursor, decode_cursor
+from src.core.etag import make_etag, etag_matches, not_modified
+from src.core.ingest import ingest_upload
+from fastapi.responses import ORJSONResponse, StreamingResponse
 import io
 import csv
+import zlib
+import orjson
 
-router = APIRouter(prefix="/books", tags=["Books"])
+router = APIRouter(
+    prefix="/books", tags=["Books"], default_response_class=ORJSONResponse
+)
 
 GenreLiteral = Literal["Fiction", "Non-Fiction", "Science", "History"]
+IncludeLiteral = Literal["author"]
+
+BOOK_OUT_FIELDS = tuple(BookOut.model_fields)
+# Ids per batch read. Longer lists than fit in a URL go through POST.
+BATCH_MAX_IDS = 1000
+
+
+def _author_payload(row) -> Optional[dict]:
+    if row["author_name"] is None:
+        return None
+    return {"id": row["author_id"], "name": row["author_name"]}
+
+
+def _book_payload(rows, include_author: bool = False) -> list[dict]:
+    # Rows come from our own table, whose constraints already match
+    # BookOut, so they are projected onto its fields, not re-validated.
+    payload = [
+        {field: row[field] for field in BOOK_OUT_FIELDS} for row in rows
+    ]
+    if include_author:
+        for item, row in zip(payload, rows):
+            item["author"] = _author_payload(row)
+    return payload
 
 
 @router.post("/", response_model=BookOut)
@@ -33,24 +73,49 @@ async def create_book(
     return await books.create_book(db, book)
 
 
-@router.get("/", response_model=List[BookOut])
+@router.get("/", response_model=List[Union[BookOut, BookWithAuthorOut]])
 @limiter.limit("10/minute")
 async def read_books(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     title: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="Ranked full-text search"),
     genre: Optional[GenreLiteral] = Query(None),
     year_from: Optional[int] = Query(None),
     year_to: Optional[int] = Query(None),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     sort_by: str = Query(
         "id",
         pattern="^(id|title|published_year|author_id)$"
     ),
     sort_order: str = Query("asc", pattern="^(asc|desc)$"),
+    count: str = Query(
+        "none",
+        pattern="^(exact|estimated|none)$",
+        description="Return the total in X-Total-Count",
+    ),
+    include: Optional[IncludeLiteral] = Query(
+        None, description="Embed related objects"
+    ),
 ):
-    return await books.get_books(
+    include_author = include == "author"
+    after = None
+    if cursor:
+        if q:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor pagination is not supported with q"
+            )
+        if offset:
+            raise HTTPException(
+                status_code=400,
+                detail="Use either cursor or offset, not both"
+            )
+        after = decode_cursor(cursor, sort_by, sort_order)
+
+    rows = await books.get_books(
         db,
         title,
         genre,
@@ -59,20 +124,143 @@ async def read_books(
         limit,
         offset,
         sort_by,
-        sort_order
+        sort_order,
+        after,
+        q,
+        include_author,
+    )
+    total = None
+    if count != "none":
+        total = await books.count_books(
+            db, title, genre, year_from, year_to, q, count
+        )
+    versions = [(row["id"], row["version"]) for row in rows]
+    extra = []
+    if total is not None:
+        # A new total must not be answered with 304 for the same page.
+        extra.append(total)
+    if include_author:
+        extra.append(include)
+    etag = make_etag("books", versions, *extra)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    headers = {"ETag": etag}
+    if total is not None:
+        headers["X-Total-Count"] = str(total[0])
+        headers["X-Total-Count-Type"] = total[1]
+    if len(rows) == limit and not q:
+        headers["X-Next-Cursor"] = encode_cursor(
+            sort_by, sort_order, rows[-1]
+        )
+    return ORJSONResponse(
+        _book_payload(rows, include_author), headers=headers
+    )
+
+
+@router.get("/facets", response_model=BookFacets)
+@limiter.limit("10/minute")
+async def read_book_facets(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    title: Optional[str] = Query(None),
+    q: Optional[str] = Query(None),
+    genre: Optional[GenreLiteral] = Query(None),
+    year_from: Optional[int] = Query(None),
+    year_to: Optional[int] = Query(None),
+    authors_limit: int = Query(10, ge=1, le=100),
+):
+    return await books.get_book_facets(
+        db, title, genre, year_from, year_to, q, authors_limit
+    )
+
+
+def _parse_ids(ids: str) -> list[int]:
+    try:
+        return [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="ids must be a comma-separated list of integers"
+        )
+
+
+async def _read_batch(db: AsyncSession, ids: list[int]):
+    # Duplicates are answered once, in the position of their first use.
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No ids given")
+    if len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BATCH_MAX_IDS} ids per request"
+        )
+    found = await books.get_books_by_ids(db, ids)
+    rows = [found[book_id] for book_id in ids if book_id in found]
+    missing = [book_id for book_id in ids if book_id not in found]
+    return rows, missing
+
+
+@router.get("/batch", response_model=BookBatch)
+@limiter.limit("10/minute")
+async def read_books_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated book ids"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    rows, missing = await _read_batch(db, _parse_ids(ids))
+    versions = [(row["id"], row["version"]) for row in rows]
+    etag = make_etag("books:batch", versions, missing)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    return ORJSONResponse(
+        {"books": _book_payload(rows), "missing": missing},
+        headers={"ETag": etag},
     )
 
 
-@router.get("/{book_id}", response_model=BookOut)
+@router.post("/batch", response_model=BookBatch)
+@limiter.limit("10/minute")
+async def read_books_batch_post(
+    request: Request,
+    body: BookBatchRequest,
+    db: AsyncSession = Depends(get_read_db),
+):
+    rows, missing = await _read_batch(db, body.ids)
+    return ORJSONResponse({"books": _book_payload(rows), "missing": missing})
+
+
+@router.get(
+    "/{book_id}", response_model=Union[BookOut, BookWithAuthorOut]
+)
 @limiter.limit("10/minute")
 async def read_book(
         request: Request,
+        response: Response,
         book_id: int,
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_read_db),
+        include: Optional[IncludeLiteral] = Query(None),
 ):
-    book = await books.get_book(db, book_id)
+    include_author = include == "author"
+    etag_parts = (include,) if include_author else ()
+    # Answer revalidation from the row version alone, before the full
+    # row is fetched or serialized.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        version = await books.get_book_version(db, book_id)
+        if version is not None:
+            etag = make_etag("book", book_id, version, *etag_parts)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    book = await books.get_book(db, book_id, include_author)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
+    response.headers["ETag"] = make_etag(
+        "book", book_id, book["version"], *etag_parts
+    )
+    if include_author:
+        return {**book, "author": _author_payload(book)}
     return book
 
 
@@ -121,33 +309,123 @@ async def bulk_import_books(
     return await books.bulk_import_books(db, books_list)
 
 
-@router.get("/export/json")
-async def export_books_json(db: AsyncSession = Depends(get_db)):
-    books_list = await books.get_books(db)
-    return JSONResponse(content=[dict(row) for row in books_list])
+@router.post("/bulk/stream", response_model=BulkImportProgress)
+async def bulk_import_books_stream(
+    db: AsyncSession = Depends(get_db),
+    file: UploadFile = File(...),
+    chunk_size: int = Query(1000, ge=1, le=10000),
+):
+    async def importer(items):
+        await books.bulk_import_books(db, items)
 
+    return await ingest_upload(file, BookCreate, importer, chunk_size)
+
+
+EXPORT_FIELDS = ["id", "title", "genre", "published_year", "author_id"]
+# CSV has no nesting, so ?include=author adds a flat column.
+EXPORT_AUTHOR_FIELDS = EXPORT_FIELDS + ["author_name"]
+
+
+def export_filters(
+    title: Optional[str] = Query(None),
+    q: Optional[str] = Query(None),
+    genre: Optional[GenreLiteral] = Query(None),
+    year_from: Optional[int] = Query(None),
+    year_to: Optional[int] = Query(None),
+    sort_by: str = Query(
+        "id",
+        pattern="^(id|title|published_year|author_id)$"
+    ),
+    sort_order: str = Query("asc", pattern="^(asc|desc)$"),
+    include: Optional[IncludeLiteral] = Query(None),
+):
+    return {
+        "title": title,
+        "q": q,
+        "genre": genre,
+        "year_from": year_from,
+        "year_to": year_to,
+        "sort_by": sort_by,
+        "sort_order": sort_order,
+        "include_author": include == "author",
+    }
+
+
+async def _export_batches(
+    db: AsyncSession, filters: dict, fields=EXPORT_FIELDS, nest=False
+):
+    # FastAPI closes yield-dependencies before the body is streamed, so
+    # the generator releases the session itself once it has finished.
+    try:
+        async for batch in books.stream_books(db, **filters):
+            rows = [{field: row[field] for field in fields} for row in batch]
+            if nest:
+                for item, row in zip(rows, batch):
+                    item["author"] = _author_payload(row)
+            yield rows
+    finally:
+        await db.close()
 
-@router.get("/export/csv")
-async def export_books_csv(db: AsyncSession = Depends(get_db)):
-    books_list = await books.get_books(db)
 
+async def _json_chunks(batches):
+    yield b"["
+    separator = b""
+    async for batch in batches:
+        if batch:
+            yield separator + b",".join(orjson.dumps(row) for row in batch)
+            separator = b","
+    yield b"]"
+
+
+async def _csv_chunks(batches, fields):
     output = io.StringIO()
-    writer = csv.DictWriter(
-        output, fieldnames=[
-            "id",
-            "title",
-            "genre",
-            "published_year",
-            "author_id"
-        ]
-    )
+    writer = csv.DictWriter(output, fieldnames=fields)
     writer.writeheader()
-    for row in books_list:
-        writer.writerow(dict(row))
-
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=books.csv"},
-    )
+    async for batch in batches:
+        writer.writerows(batch)
+        yield output.getvalue().encode("utf-8")
+        output.seek(0)
+        output.truncate()
+    if output.tell():
+        yield output.getvalue().encode("utf-8")
+
+
+async def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _export_response(chunks, media_type: str, filename: str, gzip: bool):
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+@router.get("/export/json")
+async def export_books_json(
+    db: AsyncSession = Depends(get_read_db),
+    filters: dict = Depends(export_filters),
+    gzip: bool = Query(False),
+):
+    nest = filters["include_author"]
+    chunks = _json_chunks(_export_batches(db, filters, nest=nest))
+    return _export_response(chunks, "application/json", "books.json", gzip)
+
+
+@router.get("/export/csv")
+async def export_books_csv(
+    db: AsyncSession = Depends(get_read_db),
+    filters: dict = Depends(export_filters),
+    gzip: bool = Query(False),
+):
+    fields = EXPORT_FIELDS
+    if filters["include_author"]:
+        fields = EXPORT_AUTHOR_FIELDS
+    chunks = _csv_chunks(_export_batches(db, filters, fields), fields)
+    return _export_response(chunks, "text/csv", "books.csv", gzip)
@@ -3,12 +3,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.schemas.user import UserLogin
 from src.db.database import get_db
 from src.crud import user as user_crud
+from src.crud.tokens import ensure_not_revoked, revoke_token
 from src.schemas.user import UserCreate, UserOut
 from src.auth.jwt_handler import (
     create_access_token,
     create_refresh_token,
-    decode_token
+    decode_token,
 )
+from src.auth.dependencies import get_current_user, oauth2_scheme
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -23,10 +25,10 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/login")
 async def login_user(user: UserLogin, db: AsyncSession = Depends(get_db)):
-    db_user = await user_crud.get_user_by_email(db, user.email)
-    if not db_user or not user_crud.verify_password(
-        user.password, db_user.hashed_password
-    ):
+    db_user = await user_crud.authenticate_user(
+        db, user.email, user.password
+    )
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     access_token = create_access_token({"sub": db_user.email})
@@ -40,7 +42,23 @@ async def login_user(user: UserLogin, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/refresh")
-async def refresh_token(refresh_token: str):
+async def refresh_token(
+    refresh_token: str, db: AsyncSession = Depends(get_db)
+):
     payload = decode_token(refresh_token, refresh=True)
+    await ensure_not_revoked(db, refresh_token, payload)
     new_access = create_access_token({"sub": payload["sub"]})
     return {"access_token": new_access, "token_type": "bearer"}
+
+
+@router.post("/logout")
+async def logout_user(
+    refresh_token: str | None = None,
+    token: str = Depends(oauth2_scheme),
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    await revoke_token(db, token)
+    if refresh_token:
+        await revoke_token(db, refresh_token)
+    return {"detail": "Logged out"}
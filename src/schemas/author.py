@@ -1,4 +1,5 @@
 from pydantic import BaseModel, ConfigDict
+from typing import Optional
 
 
 class AuthorBase(BaseModel):
@@ -13,3 +14,7 @@ class AuthorOut(AuthorBase):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class AuthorListOut(AuthorOut):
+    book_count: Optional[int] = None
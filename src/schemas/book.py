@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
+from src.schemas.author import AuthorOut
+
 
 class GenreEnum(str, Enum):
     fiction = "Fiction"
@@ -46,3 +48,39 @@ class BookOut(BookBase):
     author_id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class BookWithAuthorOut(BookOut):
+    author: Optional[AuthorOut] = None
+
+
+class BookBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class BookBatch(BaseModel):
+    books: List[BookOut]
+    missing: List[int]
+
+
+class GenreFacet(BaseModel):
+    value: str
+    count: int
+
+
+class DecadeFacet(BaseModel):
+    value: int
+    count: int
+
+
+class AuthorFacet(BaseModel):
+    author_id: int
+    name: str
+    count: int
+
+
+class BookFacets(BaseModel):
+    total: int
+    genres: List[GenreFacet]
+    decades: List[DecadeFacet]
+    authors: List[AuthorFacet]
@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ChunkProgress(BaseModel):
+    chunk: int
+    rows: int
+    total_rows: int
+
+
+class BulkImportProgress(BaseModel):
+    total_rows: int
+    chunks: List[ChunkProgress]
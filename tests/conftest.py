@@ -1,12 +1,20 @@
+from contextlib import contextmanager
+
+import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from src.db.models import Base
-from src.db.database import get_db
+from src.db.database import get_db, get_read_db
+from src.db.instrumentation import instrument_engine, track_queries
 from src.main import app
 from src.auth.dependencies import get_current_user
+from src.auth.jwt_handler import clear_token_cache
+from src.core.limiter import limiter
+from src.crud.books import book_cache
+from src.crud.tokens import revocations
 
 
 # Завжди підміняємо get_current_user на фейкового користувача
@@ -21,6 +29,7 @@ DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 engine = create_async_engine(DATABASE_URL, future=True, echo=False)
 TestSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+instrument_engine(engine)
 
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
@@ -45,9 +54,40 @@ async def client(db_session):
 
     # Підміняємо get_db тільки на цей сесійний
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app),
         base_url="http://test"
     ) as ac:
         yield ac
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Tests also write rows straight through the ORM, bypassing the
+    # invalidation hooks in crud, so start every test with a cold cache.
+    book_cache.clear()
+    clear_token_cache()
+    revocations.clear()
+
+
+@contextmanager
+def _assert_max_queries(limit):
+    with track_queries(record=True) as stats:
+        yield stats
+    assert stats.count <= limit, (
+        f"expected at most {limit} queries, ran {stats.count}:\n"
+        + "\n".join(stats.statements)
+    )
+
+
+@pytest.fixture
+def assert_max_queries():
+    """`with assert_max_queries(2): await client.get(...)` fails on N+1."""
+    return _assert_max_queries
@@ -2,7 +2,7 @@ import io
 import json
 import pytest
 from httpx import AsyncClient
-from src.db.models import Author
+from src.db.models import Author, Book
 from src.schemas.author import AuthorBase, AuthorCreate, AuthorOut
 from src.crud import authors as crud
 
@@ -95,3 +95,132 @@ async def test_bulk_import_authors_route_invalid_json(client: AsyncClient):
     r = await client.post("/authors/bulk", files=files)
     assert r.status_code == 400
     assert r.json()["detail"] == "Invalid JSON file"
+
+
+@pytest.mark.asyncio
+async def test_read_authors_etag(client: AsyncClient, db_session):
+    db_session.add(Author(name="ETag A1"))
+    await db_session.commit()
+
+    r = await client.get("/authors/")
+    etag = r.headers["ETag"]
+
+    r2 = await client.get("/authors/", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+
+    db_session.add(Author(name="ETag A2"))
+    await db_session.commit()
+    r3 = await client.get("/authors/", headers={"If-None-Match": etag})
+    assert r3.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_authors_stream_route(client: AsyncClient):
+    content = b'{"name": "Stream One"}\n{"name": "Stream Two"}\n{"name": "Stream Three"}\n'
+    files = {"file": ("authors.ndjson", io.BytesIO(content), "application/x-ndjson")}
+    r = await client.post("/authors/bulk/stream", params={"chunk_size": 2}, files=files)
+    assert r.status_code == 200
+    assert r.json()["total_rows"] == 3
+    assert [c["rows"] for c in r.json()["chunks"]] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_authors_dedupes_and_keeps_order(db_session):
+    existing = await crud.create_author(db_session, AuthorCreate(name="Upsert Existing"))
+
+    authors_data = [
+        AuthorCreate(name="Upsert B"),
+        AuthorCreate(name="Upsert Existing"),
+        AuthorCreate(name="Upsert A"),
+        AuthorCreate(name="Upsert B"),
+    ]
+    results = await crud.bulk_import_authors(db_session, authors_data)
+
+    assert [r["name"] for r in results] == ["Upsert B", "Upsert Existing", "Upsert A", "Upsert B"]
+    assert results[1]["id"] == existing.id
+    assert results[0]["id"] == results[3]["id"]
+    assert len({r["id"] for r in results}) == 3
+
+
+@pytest.mark.asyncio
+async def test_read_authors_prefix_search_and_pagination(client: AsyncClient, db_session):
+    db_session.add_all([Author(name=n) for n in ["Prefix Zed", "prefix alpha", "Prefix Beta", "Prefixed", "Prefiz Other", "Pre_fix"]])
+    await db_session.commit()
+
+    r = await client.get("/authors/", params={"name": "PREFIX"})
+    assert r.status_code == 200
+    assert sorted(a["name"] for a in r.json()) == ["Prefix Beta", "Prefix Zed", "Prefixed", "prefix alpha"]
+    assert all("book_count" not in a for a in r.json())
+
+    seen = []
+    params = {"name": "prefix", "limit": 3}
+    while True:
+        r = await client.get("/authors/", params=params)
+        seen += [a["name"] for a in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"name": "prefix", "limit": 3, "cursor": cursor}
+    assert seen == ["Prefix Zed", "prefix alpha", "Prefix Beta", "Prefixed"]
+
+    r2 = await client.get("/authors/", params={"name": "pre_"})
+    assert [a["name"] for a in r2.json()] == ["Pre_fix"]
+
+
+@pytest.mark.asyncio
+async def test_read_authors_non_ascii_prefix(client: AsyncClient, db_session):
+    db_session.add_all([Author(name=n) for n in ["Émile Zola", "Émilie du Châtelet", "Ёжиков Иван"]])
+    await db_session.commit()
+
+    for prefix in ["émi", "ÉMI", "Émile"]:
+        r = await client.get("/authors/", params={"name": prefix})
+        assert r.status_code == 200
+        names = sorted(a["name"] for a in r.json())
+        expected = ["Émile Zola", "Émilie du Châtelet"] if prefix != "Émile" else ["Émile Zola"]
+        assert names == expected, prefix
+
+    r = await client.get("/authors/", params={"name": "ёжик"})
+    assert [a["name"] for a in r.json()] == ["Ёжиков Иван"]
+
+
+@pytest.mark.asyncio
+async def test_read_authors_prefix_ending_in_max_code_point(client: AsyncClient, db_session):
+    db_session.add_all([Author(name=n) for n in ["Max \U0010ffff\U0010ffffa", "Max \U0010fffe", "Max \ud7ff end"]])
+    await db_session.commit()
+
+    r = await client.get("/authors/", params={"name": "max \U0010ffff"})
+    assert r.status_code == 200
+    assert [a["name"] for a in r.json()] == ["Max \U0010ffff\U0010ffffa"]
+
+    r = await client.get("/authors/", params={"name": "max \ud7ff"})
+    assert r.status_code == 200
+    assert [a["name"] for a in r.json()] == ["Max \ud7ff end"]
+
+
+def test_prefix_upper_bound():
+    assert crud._prefix_upper_bound("ab") == "ac"
+    assert crud._prefix_upper_bound("a\U0010ffff") == "b"
+    assert crud._prefix_upper_bound("\ud7ff") == "\ue000"
+    assert crud._prefix_upper_bound("\U0010ffff\U0010ffff") is None
+
+
+@pytest.mark.asyncio
+async def test_read_authors_with_book_count(client: AsyncClient, db_session):
+    prolific = Author(name="Count Prolific")
+    idle = Author(name="Count Idle")
+    db_session.add_all([prolific, idle])
+    await db_session.commit()
+    await db_session.refresh(prolific)
+    db_session.add_all([
+        Book(title=f"Counted {i}", genre="Fiction", published_year=2000, author_id=prolific.id)
+        for i in range(3)
+    ])
+    await db_session.commit()
+
+    r = await client.get("/authors/", params={"name": "count ", "with_book_count": True})
+    assert r.status_code == 200
+    counts = {a["name"]: a["book_count"] for a in r.json()}
+    assert counts == {"Count Prolific": 3, "Count Idle": 0}
+
+    rows = await crud.get_authors(db_session, name_prefix="Count P", with_book_count=True)
+    assert [(row.name, row.book_count) for row in rows] == [("Count Prolific", 3)]
@@ -1,9 +1,15 @@
 import pytest
+import base64
 import io
 import json
 from httpx import AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy import select, text
+from sqlalchemy.exc import InvalidRequestError
 from src.db.models import Book, Author
 from src.schemas.book import BookCreate, BookUpdate, BookOut, GenreEnum
+from src.crud import books as crud
+from src.crud.books import book_cache
 
 
 def test_book_create_schema_valid():
@@ -176,3 +182,634 @@ async def test_bulk_import_books_success_and_errors(db_session, client: AsyncCli
     r4 = await client.post("/books/bulk", files=files4)
     assert r4.status_code == 400
     assert "does not exist" in r4.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_read_books_cursor_pagination(db_session, client: AsyncClient):
+    author = Author(name="Cursor Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    db_session.add_all([
+        Book(title=f"Cursor Book {i}", genre="History", published_year=1900 + i % 2, author_id=author.id)
+        for i in range(5)
+    ])
+    await db_session.commit()
+
+    params = {"title": "Cursor Book", "sort_by": "published_year", "sort_order": "desc", "limit": 2}
+    r = await client.get("/books/", params={**params, "limit": 5})
+    expected = [b["id"] for b in r.json()]
+    assert len(expected) == 5
+
+    seen = []
+    cursor = None
+    while True:
+        page_params = {**params, "cursor": cursor} if cursor else params
+        r = await client.get("/books/", params=page_params)
+        assert r.status_code == 200
+        seen += [b["id"] for b in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_read_books_invalid_cursor(client: AsyncClient):
+    r = await client.get("/books/", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
+
+    r2 = await client.get("/books/", params={"limit": 1, "sort_by": "title"})
+    cursor = r2.headers["X-Next-Cursor"]
+    r3 = await client.get("/books/", params={"cursor": cursor, "sort_by": "id"})
+    assert r3.status_code == 400
+
+    r4 = await client.get("/books/", params={"cursor": cursor, "sort_by": "title", "offset": 5})
+    assert r4.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_cursor_pagination_keeps_null_sort_keys(db_session, client: AsyncClient, sort_order):
+    author = Author(name=f"Null Key Author {sort_order}")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    title = f"Null Key Book {sort_order}"
+    db_session.add_all([
+        Book(title=f"{title} {i}", genre="History", published_year=1950, author_id=author.id if i % 2 else None)
+        for i in range(6)
+    ])
+    await db_session.commit()
+
+    params = {"title": title, "sort_by": "author_id", "sort_order": sort_order, "limit": 2}
+    r = await client.get("/books/", params={**params, "limit": 10})
+    expected = [b["id"] for b in r.json()]
+    assert len(expected) == 6
+
+    seen = []
+    cursor = None
+    while True:
+        page_params = {**params, "cursor": cursor} if cursor else params
+        r = await client.get("/books/", params=page_params)
+        assert r.status_code == 200
+        seen += [b["id"] for b in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def _cursor(**payload):
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.asyncio
+async def test_read_books_cursor_key_must_match_sort_column(client: AsyncClient):
+    bad = [
+        ("author_id", "x"),
+        ("author_id", True),
+        ("author_id", 2 ** 40),
+        ("published_year", None),
+        ("title", None),
+        ("title", 5),
+    ]
+    for sort_by, key in bad:
+        cursor = _cursor(s=sort_by, o="asc", k=key, id=1)
+        r = await client.get("/books/", params={"cursor": cursor, "sort_by": sort_by})
+        assert r.status_code == 400, (sort_by, key)
+        assert r.json()["detail"] == "Invalid cursor"
+
+    cursor = _cursor(s="author_id", o="asc", k=None, id=1)
+    r = await client.get("/books/", params={"cursor": cursor, "sort_by": "author_id"})
+    assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_read_books_title_substring_search(db_session, client: AsyncClient):
+    author = Author(name="Search Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    db_session.add_all([
+        Book(title="The Hobbit Returns", genre="Fiction", published_year=1937, author_id=author.id),
+        Book(title="100% Pure_Science", genre="Science", published_year=2001, author_id=author.id),
+    ])
+    await db_session.commit()
+
+    r = await client.get("/books/", params={"title": "HOBBIT RET"})
+    assert [b["title"] for b in r.json()] == ["The Hobbit Returns"]
+
+    r2 = await client.get("/books/", params={"title": "0% pure_"})
+    assert [b["title"] for b in r2.json()] == ["100% Pure_Science"]
+
+    r3 = await client.get("/books/", params={"title": "0_ pure"})
+    assert r3.json() == []
+
+
+@pytest.mark.asyncio
+async def test_read_books_full_text_search(db_session, client: AsyncClient):
+    author = Author(name="FTS Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    db_session.add_all([
+        Book(title="Dragons of the North", genre="Fiction", published_year=1990, author_id=author.id),
+        Book(title="Dragon dragon dragons", genre="Fiction", published_year=1991, author_id=author.id),
+        Book(title="Northern Lights", genre="Science", published_year=1992, author_id=author.id),
+    ])
+    await db_session.commit()
+
+    r = await client.get("/books/", params={"q": "dragon"})
+    assert r.status_code == 200
+    assert [b["title"] for b in r.json()] == ["Dragon dragon dragons", "Dragons of the North"]
+    assert "X-Next-Cursor" not in r.headers
+
+    r2 = await client.get("/books/", params={"q": "dragons north", "genre": "Fiction"})
+    assert [b["title"] for b in r2.json()] == ["Dragons of the North"]
+
+    r3 = await client.get("/books/", params={"q": "\"-*"})
+    assert r3.status_code == 200
+    assert r3.json() == []
+
+    r4 = await client.get("/books/", params={"q": "dragon", "cursor": "abc"})
+    assert r4.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_book_reads_are_cached_and_invalidated_on_write(db_session, client: AsyncClient):
+    author = Author(name="Cache Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    payload = {"title": "Cached Book", "genre": "Fiction", "published_year": 2005, "author_id": author.id}
+    book_id = (await client.post("/books/", json=payload)).json()["id"]
+
+    list_params = {"title": "cached book"}
+    await client.get(f"/books/{book_id}")
+    await client.get("/books/", params=list_params)
+    hits = book_cache.stats()["hits"]
+
+    r = await client.get(f"/books/{book_id}")
+    r2 = await client.get("/books/", params={"title": "CACHED BOOK"})
+    assert r.json()["title"] == "Cached Book"
+    assert [b["id"] for b in r2.json()] == [book_id]
+    assert book_cache.stats()["hits"] == hits + 2
+
+    await client.put(f"/books/{book_id}", json={"title": "Cached Book v2"})
+    r3 = await client.get(f"/books/{book_id}")
+    r4 = await client.get("/books/", params=list_params)
+    assert r3.json()["title"] == "Cached Book v2"
+    assert r4.json()[0]["title"] == "Cached Book v2"
+
+    await client.delete(f"/books/{book_id}")
+    r5 = await client.get(f"/books/{book_id}")
+    r6 = await client.get("/books/", params=list_params)
+    assert r5.status_code == 404
+    assert r6.json() == []
+
+    await client.post("/books/", json=payload)
+    r7 = await client.get("/books/", params=list_params)
+    assert len(r7.json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_read_book_etag_and_conditional_get(db_session, client: AsyncClient):
+    author = Author(name="ETag Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    payload = {"title": "ETag Book", "genre": "Science", "published_year": 2012, "author_id": author.id}
+    book_id = (await client.post("/books/", json=payload)).json()["id"]
+
+    r = await client.get(f"/books/{book_id}")
+    etag = r.headers["ETag"]
+    assert etag.startswith('"')
+
+    r2 = await client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.headers["ETag"] == etag
+    assert r2.content == b""
+
+    r3 = await client.get(f"/books/{book_id}", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert r3.status_code == 304
+
+    await client.put(f"/books/{book_id}", json={"published_year": 2013})
+    r4 = await client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert r4.status_code == 200
+    assert r4.headers["ETag"] != etag
+    assert r4.json()["published_year"] == 2013
+
+    r5 = await client.get("/books/99999", headers={"If-None-Match": etag})
+    assert r5.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_read_books_etag(db_session, client: AsyncClient):
+    author = Author(name="List ETag Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    payload = {"title": "List ETag Book", "genre": "Science", "published_year": 2012, "author_id": author.id}
+    await client.post("/books/", json=payload)
+
+    params = {"title": "List ETag"}
+    r = await client.get("/books/", params=params)
+    etag = r.headers["ETag"]
+
+    r2 = await client.get("/books/", params=params, headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+
+    await client.post("/books/", json={**payload, "title": "List ETag Book 2"})
+    r3 = await client.get("/books/", params=params, headers={"If-None-Match": etag})
+    assert r3.status_code == 200
+    assert len(r3.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_export_books_streams_all_matching_rows(db_session, client: AsyncClient):
+    author = Author(name="Export Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    db_session.add_all([
+        Book(title=f"Export Book {i:02d}", genre="History", published_year=1950 + i, author_id=author.id)
+        for i in range(25)
+    ])
+    await db_session.commit()
+
+    params = {"title": "Export Book", "year_from": 1960, "sort_by": "title", "sort_order": "desc"}
+    r = await client.get("/books/export/json", params=params)
+    assert r.status_code == 200
+    data = r.json()
+    assert [b["title"] for b in data] == [f"Export Book {i:02d}" for i in range(24, 9, -1)]
+    assert set(data[0]) == {"id", "title", "genre", "published_year", "author_id"}
+
+    r2 = await client.get("/books/export/csv", params=params)
+    assert r2.status_code == 200
+    lines = r2.text.strip().splitlines()
+    assert lines[0] == "id,title,genre,published_year,author_id"
+    assert len(lines) == 16
+    assert "Export Book 24" in lines[1]
+
+    r3 = await client.get("/books/export/json", params={**params, "gzip": True})
+    assert r3.headers["content-encoding"] == "gzip"
+    assert r3.json() == data
+
+    r4 = await client.get("/books/export/json", params={"title": "No Such Export"})
+    assert r4.json() == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_books_upserts_in_input_order(db_session):
+    author = Author(name="Upsert Author")
+    other = Author(name="Upsert Other")
+    db_session.add_all([author, other])
+    await db_session.commit()
+    await db_session.refresh(author)
+    await db_session.refresh(other)
+
+    existing = Book(title="Upsert Existing", genre="History", published_year=1999, author_id=author.id)
+    db_session.add(existing)
+    await db_session.commit()
+    await db_session.refresh(existing)
+
+    items = [
+        BookCreate(title="Upsert New", genre=GenreEnum.fiction, published_year=2001, author_id=author.id),
+        BookCreate(title="Upsert Existing", genre=GenreEnum.science, published_year=2020, author_id=author.id),
+        BookCreate(title="Upsert New", genre=GenreEnum.science, published_year=2002, author_id=author.id),
+        BookCreate(title="Upsert New", genre=GenreEnum.history, published_year=2003, author_id=other.id),
+    ]
+    results = await crud.bulk_import_books(db_session, items)
+
+    assert [(r["title"], r["author_id"]) for r in results] == [
+        (b.title, b.author_id) for b in items
+    ]
+    assert results[1]["id"] == existing.id
+    assert results[1]["genre"] == "History"
+    assert results[0]["id"] == results[2]["id"]
+    assert results[2]["published_year"] == 2001
+    assert results[3]["id"] != results[0]["id"]
+
+    again = await crud.bulk_import_books(db_session, items)
+    assert [r["id"] for r in again] == [r["id"] for r in results]
+
+
+@pytest.mark.asyncio
+async def test_create_book_duplicate_title_for_author(db_session, client: AsyncClient):
+    author = Author(name="Duplicate Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    payload = {"title": "Only Once", "genre": "Fiction", "published_year": 2000, "author_id": author.id}
+    r = await client.post("/books/", json=payload)
+    assert r.status_code == 200
+
+    r2 = await client.post("/books/", json=payload)
+    assert r2.status_code == 400
+    assert r2.json()["detail"] == "Book with this title already exists for this author"
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_books_stream_formats(db_session, client: AsyncClient):
+    author = Author(name="Stream Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    rows = [
+        {"title": f"Stream {i}", "genre": "Science", "published_year": 2000 + i, "author_id": author.id}
+        for i in range(5)
+    ]
+    json_file = json.dumps(rows).encode()
+    ndjson_file = "\n".join(json.dumps({**r, "title": r["title"] + " nd"}) for r in rows).encode()
+    csv_file = ("title,genre,published_year,author_id\n" + "".join(
+        f"{r['title']} csv,{r['genre']},{r['published_year']},{r['author_id']}\n" for r in rows
+    )).encode()
+
+    for name, content in [("b.json", json_file), ("b.ndjson", ndjson_file), ("b.csv", csv_file)]:
+        files = {"file": (name, io.BytesIO(content), "application/octet-stream")}
+        r = await client.post("/books/bulk/stream", params={"chunk_size": 2}, files=files)
+        assert r.status_code == 200, r.text
+        assert r.json() == {
+            "total_rows": 5,
+            "chunks": [
+                {"chunk": 1, "rows": 2, "total_rows": 2},
+                {"chunk": 2, "rows": 2, "total_rows": 4},
+                {"chunk": 3, "rows": 1, "total_rows": 5},
+            ],
+        }
+
+    r = await client.get("/books/", params={"title": "Stream", "limit": 100})
+    assert len(r.json()) == 15
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_books_stream_errors(db_session, client: AsyncClient):
+    author = Author(name="Stream Error Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+
+    files = {"file": ("b.txt", io.BytesIO(b"[]"), "text/plain")}
+    r = await client.post("/books/bulk/stream", files=files)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Only JSON, NDJSON and CSV files are supported"
+
+    rows = [
+        {"title": "Stream Err 1", "genre": "Science", "published_year": 2000, "author_id": author.id},
+        {"title": "Stream Err 2", "genre": "Science", "published_year": 2000, "author_id": author.id},
+        {"title": "Stream Err 3", "genre": "Poetry", "published_year": 2000, "author_id": author.id},
+    ]
+    files = {"file": ("b.json", io.BytesIO(json.dumps(rows).encode()), "application/json")}
+    r = await client.post("/books/bulk/stream", params={"chunk_size": 2}, files=files)
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Invalid row 3: genre:")
+    assert r.json()["detail"].endswith("(2 rows committed before the error)")
+
+    files = {"file": ("b.json", io.BytesIO(b'[{"title": "x"} {'), "application/json")}
+    r = await client.post("/books/bulk/stream", files=files)
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Invalid JSON file")
+
+
+@pytest.mark.asyncio
+async def test_read_books_fast_path_matches_book_out(db_session, client: AsyncClient):
+    author = Author(name="Serializer Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+    db_session.add_all([
+        Book(title=f"Serialized {i}", genre="History", published_year=1900 + i, author_id=author.id)
+        for i in range(3)
+    ])
+    await db_session.commit()
+
+    r = await client.get("/books/?title=Serialized&limit=3")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert r.headers["etag"]
+    assert r.headers["x-next-cursor"]
+
+    rows = await crud.get_books(db_session, title="Serialized", limit=3)
+    adapter = TypeAdapter(list[BookOut])
+    expected = adapter.dump_python(adapter.validate_python(rows), mode="json")
+    assert r.json() == expected
+    assert all("version" not in book for book in r.json())
+
+
+@pytest.mark.asyncio
+async def test_book_queries_reuse_statement_shapes(db_session):
+    author = Author(name="Shape Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+    book = Book(title="Shape Book", genre="Fiction", published_year=2001, author_id=author.id)
+    db_session.add(book)
+    await db_session.commit()
+
+    first, _ = crud.books_query_shape("sqlite", genre="Fiction", year_from=1900, limit=10)
+    second, params = crud.books_query_shape("sqlite", genre="Science", year_from=2000, limit=50, offset=10)
+    assert first == second
+    assert crud.books_statement(first) is crud.books_statement(second)
+    assert params == {"genre": "Science", "year_from": 2000, "limit": 50, "offset": 10}
+
+    crud.statement_counts.clear()
+    for genre in ("Fiction", "Science", "History"):
+        await crud.get_books(db_session, genre=genre, year_from=1900, limit=10)
+    await crud.update_book(db_session, book.id, BookUpdate(genre="History", title="Shape Book 2"))
+    await crud.update_book(db_session, book.id, BookUpdate(title="Shape Book 3", genre="Science"))
+
+    assert crud.statement_stats() == {
+        "books.list:sqlite:genre+year_from:id_asc:page": 3,
+        "books.update:title+genre": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_books_exact_count(db_session, client: AsyncClient, assert_max_queries):
+    author = Author(name="Count Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+    db_session.add_all([Book(title=f"Total Counted {i}", genre="Fiction", published_year=2000 + i, author_id=author.id) for i in range(3)])
+    await db_session.commit()
+
+    r = await client.get("/books/", params={"title": "total counted", "limit": 2, "count": "exact"})
+    assert r.status_code == 200
+    assert len(r.json()) == 2
+    assert r.headers["x-total-count"] == "3"
+    assert r.headers["x-total-count-type"] == "exact"
+    etag = r.headers["etag"]
+
+    # Another page of the same filter reuses the cached total.
+    with assert_max_queries(1):
+        r = await client.get("/books/", params={"title": "Total Counted", "limit": 2, "offset": 2, "count": "exact"})
+    assert r.headers["x-total-count"] == "3"
+
+    payload = {"title": "Total Counted 3", "genre": "Fiction", "published_year": 2010, "author_id": author.id}
+    assert (await client.post("/books/", json=payload)).status_code == 200
+
+    r = await client.get("/books/", params={"title": "Total Counted", "limit": 2, "count": "exact"})
+    assert r.headers["x-total-count"] == "4"
+    # Same page, new total: the ETag must change too.
+    assert r.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_read_books_count_modes(client: AsyncClient):
+    r = await client.get("/books/")
+    assert "x-total-count" not in r.headers
+    r = await client.get("/books/", params={"count": "none"})
+    assert "x-total-count" not in r.headers
+    r = await client.get("/books/", params={"count": "approximate"})
+    assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_estimated_count_sqlite(db_session, client: AsyncClient):
+    author = Author(name="Estimate Author")
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+    db_session.add(Book(title="Estimated", genre="History", published_year=1999, author_id=author.id))
+    await db_session.commit()
+
+    # SQLite has no per-filter estimates, so filtered counts are exact.
+    r = await client.get("/books/", params={"genre": "History", "count": "estimated"})
+    assert r.headers["x-total-count-type"] == "exact"
+
+    await db_session.execute(text("ANALYZE"))
+    await db_session.commit()
+    exact = int((await client.get("/books/", params={"count": "exact"})).headers["x-total-count"])
+    r = await client.get("/books/", params={"count": "estimated"})
+    assert r.headers["x-total-count-type"] == "estimated"
+    assert int(r.headers["x-total-count"]) == exact
+
+    # Statistics only move on the next ANALYZE; exact counts move at once.
+    db_session.add(Book(title="Estimated 2", genre="History", published_year=1999, author_id=author.id))
+    await db_session.commit()
+    book_cache.clear()
+    assert int((await client.get("/books/", params={"count": "estimated"})).headers["x-total-count"]) == exact
+    assert int((await client.get("/books/", params={"count": "exact"})).headers["x-total-count"]) == exact + 1
+
+
+def test_count_statement_ignores_sort_and_pagination():
+    shape, _ = crud.books_query_shape("sqlite", genre="Fiction", limit=10, sort_by="title", sort_order="desc", after=("A", 1))
+    other, _ = crud.books_query_shape("sqlite", genre="Science", limit=None)
+    assert crud._count_shape(shape) == crud._count_shape(other)
+    assert crud.count_statement(crud._count_shape(shape)).text == "SELECT COUNT(*) FROM books WHERE 1=1 AND genre = :genre"
+
+    pg, _ = crud.books_query_shape("postgresql", q="rome", year_from=1900, limit=10)
+    assert crud.explain_statement(crud._count_shape(pg)).text == (
+        "EXPLAIN (FORMAT JSON) SELECT 1 FROM books WHERE 1=1"
+        " AND to_tsvector('english', title) @@ plainto_tsquery('english', :q)"
+        " AND published_year >= :year_from"
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_books_batch(db_session, client: AsyncClient, assert_max_queries):
+    author = Author(name="Batch Author")
+    db_session.add(author)
+    await db_session.commit()
+    batch = [Book(title=f"Batch {i}", genre="Fiction", published_year=2001, author_id=author.id) for i in range(3)]
+    db_session.add_all(batch)
+    await db_session.commit()
+    first, second, third = (b.id for b in batch)
+
+    with assert_max_queries(1):
+        r = await client.get("/books/batch", params={"ids": f"{third},999999,{first},{third}"})
+    assert r.status_code == 200
+    body = r.json()
+    assert [b["id"] for b in body["books"]] == [third, first]
+    assert body["missing"] == [999999]
+
+    # Books read once are served from the cache.
+    with assert_max_queries(1):
+        r = await client.get("/books/batch", params={"ids": f"{first},{second}"})
+    assert [b["title"] for b in r.json()["books"]] == ["Batch 0", "Batch 1"]
+
+    r2 = await client.get("/books/batch", params={"ids": f"{first},{second}"}, headers={"If-None-Match": r.headers["etag"]})
+    assert r2.status_code == 304
+
+    r = await client.post("/books/batch", json={"ids": [second, 999998, first]})
+    assert r.status_code == 200
+    assert [b["id"] for b in r.json()["books"]] == [second, first]
+    assert r.json()["missing"] == [999998]
+
+
+@pytest.mark.asyncio
+async def test_read_books_batch_invalid(client: AsyncClient):
+    assert (await client.get("/books/batch", params={"ids": "1,x"})).status_code == 400
+    assert (await client.get("/books/batch", params={"ids": ","})).status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 1002))
+    assert (await client.get("/books/batch", params={"ids": too_many})).status_code == 400
+    assert (await client.post("/books/batch", json={"ids": []})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_batch_is_one_rate_limit_hit(client: AsyncClient):
+    ids = ",".join(str(i) for i in range(1, 51))
+    for _ in range(10):
+        assert (await client.get("/books/batch", params={"ids": ids})).status_code == 200
+    assert (await client.get("/books/batch", params={"ids": ids})).status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_include_author(db_session, client: AsyncClient, assert_max_queries):
+    author = Author(name="Embedded Author")
+    db_session.add(author)
+    await db_session.commit()
+    db_session.add_all([Book(title=f"Embedded Book {i}", genre="Science", published_year=1990, author_id=author.id) for i in range(3)])
+    await db_session.commit()
+    embedded = {"id": author.id, "name": "Embedded Author"}
+
+    with assert_max_queries(1):
+        r = await client.get("/books/", params={"title": "Embedded Book", "include": "author"})
+    assert r.status_code == 200
+    assert len(r.json()) == 3
+    assert all(b["author"] == embedded for b in r.json())
+
+    plain = await client.get("/books/", params={"title": "Embedded Book"})
+    assert "author" not in plain.json()[0]
+    assert plain.headers["etag"] != r.headers["etag"]
+
+    book_id = r.json()[0]["id"]
+    with assert_max_queries(1):
+        r = await client.get(f"/books/{book_id}", params={"include": "author"})
+    assert r.json()["author"] == embedded
+    assert "author" not in (await client.get(f"/books/{book_id}")).json()
+
+    r = await client.get("/books/export/json", params={"title": "Embedded Book", "include": "author"})
+    assert r.json()[0]["author"] == embedded
+    r = await client.get("/books/export/csv", params={"title": "Embedded Book", "include": "author"})
+    lines = r.text.strip().splitlines()
+    assert lines[0] == "id,title,genre,published_year,author_id,author_name"
+    assert lines[1].endswith(",Embedded Author")
+
+    assert (await client.get("/books/", params={"include": "reviews"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_book_author_relationship_never_lazy_loads(db_session):
+    author = Author(name="Lazy Author")
+    db_session.add(author)
+    await db_session.commit()
+    db_session.add(Book(title="Lazy Book", genre="Fiction", published_year=2001, author_id=author.id))
+    await db_session.commit()
+
+    book = (await db_session.execute(select(Book).where(Book.title == "Lazy Book"))).scalar_one()
+    with pytest.raises(InvalidRequestError):
+        book.author
@@ -0,0 +1,73 @@
+from src.core.cache import InMemoryLRUCache, NullCache, create_cache, make_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_hits_misses_and_evictions():
+    cache = InMemoryLRUCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)           # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "backend": "memory",
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "expirations": 0,
+        "size": 2,
+        "maxsize": 2,
+    }
+
+
+def test_lru_cache_ttl_expiry():
+    clock = FakeClock()
+    cache = InMemoryLRUCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+
+    clock.now = 6
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_observer_sees_every_event():
+    clock = FakeClock()
+    cache = InMemoryLRUCache(maxsize=1, ttl=5, clock=clock)
+    events = []
+    cache.observer = events.append
+    cache.set("a", 1)
+    cache.get("a")
+    cache.set("b", 2)
+    cache.get("a")
+    clock.now = 6
+    cache.get("b")
+    assert events == ["hit", "eviction", "miss", "expiration", "miss"]
+
+
+def test_versions_survive_eviction():
+    cache = InMemoryLRUCache(maxsize=1, ttl=None)
+    cache.bump_version("ns")
+    cache.set("x", 1)
+    cache.set("y", 2)
+    assert cache.get_version("ns") == 1
+
+
+def test_make_key_is_order_independent():
+    assert make_key("p", a=1, b=None) == make_key("p", b=None, a=1)
+    assert make_key("p", a=1) != make_key("p", a=2)
+
+
+def test_create_cache_backends():
+    assert isinstance(create_cache("memory"), InMemoryLRUCache)
+    assert isinstance(create_cache("none"), NullCache)
@@ -0,0 +1,145 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from src.crud import books as crud
+from src.db.models import Author, Book
+
+# Years no other test uses, so the facets below only see these books.
+YEARS = {"year_from": 1300, "year_to": 1399}
+
+
+async def _author(db_session, name):
+    author = Author(name=name)
+    db_session.add(author)
+    await db_session.commit()
+    await db_session.refresh(author)
+    return author
+
+
+async def _create(client, title, genre, year, author_id):
+    payload = {"title": title, "genre": genre, "published_year": year, "author_id": author_id}
+    r = await client.post("/books/", json=payload)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+async def _summary_matches_books(db_session):
+    summary = await db_session.execute(text(
+        "SELECT genre, published_year, book_count FROM book_genre_year_counts "
+        "WHERE published_year BETWEEN 1300 AND 1399 AND book_count > 0 ORDER BY 1, 2"
+    ))
+    recount = await db_session.execute(text(
+        "SELECT genre, published_year, COUNT(*) FROM books "
+        "WHERE published_year BETWEEN 1300 AND 1399 GROUP BY 1, 2 ORDER BY 1, 2"
+    ))
+    return summary.all() == recount.all()
+
+
+@pytest.mark.asyncio
+async def test_facets_follow_writes(db_session, client: AsyncClient):
+    author = await _author(db_session, "Facet Author")
+    first = await _create(client, "Facet One", "Fiction", 1301, author.id)
+    await _create(client, "Facet Two", "Fiction", 1315, author.id)
+    await _create(client, "Facet Three", "History", 1318, author.id)
+
+    r = await client.get("/books/facets", params=YEARS)
+    assert r.status_code == 200
+    assert r.json() == {
+        "total": 3,
+        "genres": [{"value": "Fiction", "count": 2}, {"value": "History", "count": 1}],
+        "decades": [{"value": 1300, "count": 1}, {"value": 1310, "count": 2}],
+        "authors": [{"author_id": author.id, "name": "Facet Author", "count": 3}],
+    }
+
+    r = await client.put(f"/books/{first['id']}", json={"genre": "Science", "published_year": 1322})
+    assert r.status_code == 200
+    facets = (await client.get("/books/facets", params=YEARS)).json()
+    assert facets["genres"] == [
+        {"value": "Fiction", "count": 1},
+        {"value": "History", "count": 1},
+        {"value": "Science", "count": 1},
+    ]
+    assert facets["decades"] == [{"value": 1310, "count": 2}, {"value": 1320, "count": 1}]
+
+    assert (await client.delete(f"/books/{first['id']}")).status_code == 200
+    facets = (await client.get("/books/facets", params=YEARS)).json()
+    assert facets["total"] == 2
+    assert await _summary_matches_books(db_session)
+
+
+@pytest.mark.asyncio
+async def test_facets_move_books_between_authors(db_session, client: AsyncClient):
+    old = await _author(db_session, "Facet Old Author")
+    new = await _author(db_session, "Facet New Author")
+    book = await _create(client, "Moving Book", "Science", 1350, old.id)
+    await _create(client, "Staying Book", "Science", 1351, old.id)
+
+    await client.put(f"/books/{book['id']}", json={"author_id": new.id})
+
+    facets = (await client.get("/books/facets", params={"genre": "Science", "authors_limit": 100})).json()
+    authors = {a["author_id"]: a["count"] for a in facets["authors"]}
+    assert authors[old.id] == 1
+    assert authors[new.id] == 1
+
+
+@pytest.mark.asyncio
+async def test_facets_count_bulk_imports_once(db_session, client: AsyncClient):
+    author = await _author(db_session, "Facet Bulk Author")
+    books = [{"title": f"Bulk Facet {i}", "genre": "History", "published_year": 1360 + i, "author_id": author.id} for i in range(4)]
+    files = {"file": ("books.json", json.dumps(books), "application/json")}
+    assert (await client.post("/books/bulk", files=files)).status_code == 200
+    # Re-importing existing books must not count them again.
+    files = {"file": ("books.json", json.dumps(books), "application/json")}
+    assert (await client.post("/books/bulk", files=files)).status_code == 200
+
+    facets = (await client.get("/books/facets", params={"year_from": 1360, "year_to": 1369})).json()
+    assert facets["total"] == 4
+    assert facets["authors"] == [{"author_id": author.id, "name": "Facet Bulk Author", "count": 4}]
+    assert await _summary_matches_books(db_session)
+
+
+@pytest.mark.asyncio
+async def test_facets_title_filter_is_computed_from_books(db_session, client: AsyncClient):
+    author = await _author(db_session, "Facet Title Author")
+    # Inserted through the ORM, bypassing the summaries entirely.
+    db_session.add_all([
+        Book(title="Zebra Facet 1", genre="Fiction", published_year=1371, author_id=author.id),
+        Book(title="Zebra Facet 2", genre="Science", published_year=1382, author_id=author.id),
+    ])
+    await db_session.commit()
+
+    facets = (await client.get("/books/facets", params={"title": "zebra facet"})).json()
+    assert facets["total"] == 2
+    assert facets["decades"] == [{"value": 1370, "count": 1}, {"value": 1380, "count": 1}]
+    assert facets["authors"][0]["author_id"] == author.id
+
+
+@pytest.mark.asyncio
+async def test_facets_are_cached_until_a_write(db_session, client: AsyncClient, assert_max_queries):
+    author = await _author(db_session, "Facet Cache Author")
+    await _create(client, "Cached Facet", "Fiction", 1390, author.id)
+
+    await client.get("/books/facets", params=YEARS)
+    with assert_max_queries(0):
+        await client.get("/books/facets", params=YEARS)
+
+    await _create(client, "Cached Facet 2", "Fiction", 1391, author.id)
+    with assert_max_queries(3):
+        facets = (await client.get("/books/facets", params=YEARS)).json()
+    assert {"value": 1390, "count": 2} in facets["decades"]
+
+
+def test_facet_statements_use_summaries_for_genre_and_year():
+    shape, _ = crud.books_query_shape("sqlite", genre="Fiction", year_from=1900, limit=None)
+    genres, decades, authors = crud.facet_statements(crud._count_shape(shape))
+    assert "FROM book_genre_year_counts" in genres.text
+    assert "FROM book_genre_year_counts" in decades.text
+    # Author counts are not kept per year.
+    assert "FROM books" in authors.text
+
+    shape, _ = crud.books_query_shape("sqlite", genre="Fiction", limit=None)
+    _, _, authors = crud.facet_statements(crud._count_shape(shape))
+    assert "FROM author_genre_counts" in authors.text
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+from src.core.ingest import InvalidUpload, iter_csv, iter_json_array, iter_ndjson
+from src.core import ingest
+
+
+@pytest.fixture
+def small_reads(monkeypatch):
+    # Force records to straddle read boundaries.
+    monkeypatch.setattr(ingest, "READ_SIZE", 7)
+
+
+def test_iter_json_array_across_reads(small_reads):
+    data = b'[ {"name": "A, \\"quoted\\" ]"} ,\n{"name": "\xc3\xa9"}, {"n": [1, {"x": 2}]} ]'
+    assert list(iter_json_array(io.BytesIO(data))) == [
+        {"name": 'A, "quoted" ]'},
+        {"name": "é"},
+        {"n": [1, {"x": 2}]},
+    ]
+    assert list(iter_json_array(io.BytesIO(b"[]"))) == []
+
+
+@pytest.mark.parametrize("data", [b'{"a": 1}', b"[1, 2]", b'[{"a": 1}', b'[{"a": 1}} ]', b'[{"a": 1}] x'])
+def test_iter_json_array_rejects_invalid(data):
+    with pytest.raises(InvalidUpload):
+        list(iter_json_array(io.BytesIO(data)))
+
+
+def test_iter_ndjson(small_reads):
+    data = b'{"name": "A"}\n\n{"name": "B"}\r\n{"name": "C"}'
+    assert [r["name"] for r in iter_ndjson(io.BytesIO(data))] == ["A", "B", "C"]
+
+    with pytest.raises(InvalidUpload):
+        list(iter_ndjson(io.BytesIO(b'{"name": "A"}\n[1]\n')))
+
+
+def test_iter_csv(small_reads):
+    data = b'\xef\xbb\xbftitle,genre\n"Multi\nline, title",Fiction\nPlain,Science\n'
+    assert list(iter_csv(io.BytesIO(data))) == [
+        {"title": "Multi\nline, title", "genre": "Fiction"},
+        {"title": "Plain", "genre": "Science"},
+    ]
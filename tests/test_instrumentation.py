@@ -0,0 +1,135 @@
+import json
+import logging
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from src.db import instrumentation
+from src.db.instrumentation import track_queries
+from src.db.models import Author, Book
+
+SERVER_TIMING = re.compile(r'^db;dur=\d+\.\d;desc="(\d+) queries"$')
+
+
+async def _author(db_session, name):
+    author = Author(name=name)
+    db_session.add(author)
+    await db_session.commit()
+    return author
+
+
+def _books_file(author_id, prefix, count):
+    books = [{"title": f"{prefix} {i}", "genre": "Fiction", "published_year": 2000, "author_id": author_id} for i in range(count)]
+    return {"file": ("books.json", json.dumps(books), "application/json")}
+
+
+def _authors_file(prefix, count):
+    authors = [{"name": f"{prefix} {i}"} for i in range(count)]
+    return {"file": ("authors.json", json.dumps(authors), "application/json")}
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(db_session, client: AsyncClient):
+    author = await _author(db_session, "Timing Author")
+    db_session.add(Book(title="Timed", genre="Fiction", published_year=2001, author_id=author.id))
+    await db_session.commit()
+
+    r = await client.get("/books/", params={"title": "Timed"})
+    assert r.status_code == 200
+    match = SERVER_TIMING.match(r.headers["server-timing"])
+    assert match and int(match.group(1)) >= 1
+
+    # The second request is served from the cache without touching SQL.
+    r = await client.get("/books/", params={"title": "Timed"})
+    assert SERVER_TIMING.match(r.headers["server-timing"]).group(1) == "0"
+
+
+@pytest.mark.asyncio
+async def test_request_summary_is_logged(client: AsyncClient, caplog):
+    with caplog.at_level(logging.INFO, logger="src.db.instrumentation"):
+        await client.get("/books/999999")
+
+    record = next(r for r in caplog.records if getattr(r, "path", None) == "/books/999999")
+    assert record.method == "GET"
+    assert record.status == 404
+    assert record.queries == 1
+    assert record.db_ms >= 0
+    assert "queries=1" in record.getMessage()
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="src.db.instrumentation"):
+        await db_session.execute(
+            text("SELECT :title AS title,\n       :hashed_password AS pw"),
+            {"title": "Slow", "hashed_password": "hash"},
+        )
+
+    record = next(r for r in caplog.records if r.getMessage().startswith("slow query"))
+    message = record.getMessage()
+    assert record.statement == "SELECT ? AS title, ? AS pw"
+    assert "{'title': 'Slow', 'hashed_password': '***'}" in message
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_threshold(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 60_000)
+    with caplog.at_level(logging.WARNING, logger="src.db.instrumentation"):
+        await db_session.execute(text("SELECT 1"))
+    assert not caplog.records
+
+
+@pytest.mark.asyncio
+async def test_track_queries_nests(db_session):
+    with track_queries() as outer:
+        await db_session.execute(text("SELECT 1"))
+        with track_queries(record=True) as inner:
+            await db_session.execute(text("SELECT 2"))
+    assert outer.count == 2
+    assert inner.count == 1
+    assert inner.statements == ["SELECT 2"]
+
+
+@pytest.mark.asyncio
+async def test_assert_max_queries_fails_on_excess(client: AsyncClient, assert_max_queries):
+    with pytest.raises(AssertionError, match="expected at most 0 queries"):
+        with assert_max_queries(0):
+            await client.get("/books/999999")
+
+
+@pytest.mark.asyncio
+async def test_read_routes_query_budget(db_session, client: AsyncClient, assert_max_queries):
+    author = await _author(db_session, "Budget Author")
+    book = Book(title="Budget", genre="Fiction", published_year=2001, author_id=author.id)
+    db_session.add(book)
+    await db_session.commit()
+
+    with assert_max_queries(1):
+        await client.get("/books/", params={"limit": 50})
+    with assert_max_queries(1):
+        await client.get(f"/books/{book.id}")
+    with assert_max_queries(1):
+        await client.get("/authors/", params={"limit": 50})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [3, 60])
+async def test_bulk_import_books_query_budget(db_session, client: AsyncClient, assert_max_queries, count):
+    author = await _author(db_session, f"Bulk Budget {count}")
+    # Author check, insert, re-select of existing rows, two summary upserts.
+    with assert_max_queries(5):
+        r = await client.post("/books/bulk", files=_books_file(author.id, f"Budget {count}", count))
+    assert r.status_code == 200
+    assert len(r.json()) == count
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [3, 60])
+async def test_bulk_import_authors_query_budget(client: AsyncClient, assert_max_queries, count):
+    with assert_max_queries(2):
+        r = await client.post("/authors/bulk", files=_authors_file(f"Budget Author {count}", count))
+    assert r.status_code == 200
+    assert len(r.json()) == count
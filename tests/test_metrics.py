@@ -0,0 +1,182 @@
+import asyncio
+import multiprocessing
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.metrics import instrument_pool
+from src.db.models import Author, Book
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _requests_from_process(requests):
+    from src.main import app
+
+    async def run():
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            for _ in range(requests):
+                await client.get("/")
+
+    asyncio.run(run())
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_are_labelled_by_route_template(client):
+    labels = {"method": "GET", "route": "/books/{book_id}"}
+    before = sample("http_requests_total", status="404", **labels)
+    observed = sample("http_request_duration_seconds_count", **labels)
+
+    for book_id in (999998, 999999):
+        r = await client.get(f"/books/{book_id}")
+        assert r.status_code == 404
+
+    assert sample("http_requests_total", status="404", **labels) == before + 2
+    assert sample("http_request_duration_seconds_count", **labels) == observed + 2
+    assert sample("http_requests_in_progress", **labels) == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    await client.get("/")
+    r = await client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in r.text
+    assert 'route="/metrics"' not in r.text
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejections_are_counted(client):
+    labels = {"route": "/authors/", "limit": "10 per 1 minute"}
+    before = sample("rate_limit_rejections_total", **labels)
+
+    statuses = [(await client.get("/authors/")).status_code for _ in range(12)]
+
+    assert statuses.count(429) == 2
+    assert sample("rate_limit_rejections_total", **labels) == before + 2
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    instrument_pool(engine, "test")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert sample("db_pool_checked_out", pool="test") == 1
+        assert sample("db_pool_checked_out", pool="test") == 0
+        assert sample("db_pool_overflow", pool="test") == 0
+        assert sample("db_pool_size", pool="test") == 5
+        assert sample("db_pool_checkout_seconds_count", pool="test") == 1
+
+        # dispose() replaces the pool; checkouts must still be timed.
+        await engine.dispose()
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        assert sample("db_pool_checkout_seconds_count", pool="test") == 2
+    finally:
+        await engine.dispose()
+
+
+def test_metrics_are_aggregated_across_processes(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_requests_from_process, args=(3,)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    labels = {"method": "GET", "route": "/", "status": "200"}
+    assert registry.get_sample_value("http_requests_total", labels) == 6
+    assert registry.get_sample_value("http_requests_in_progress", {"method": "GET", "route": "/"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_overflow_metrics(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=1)
+    instrument_pool(engine, "overflow")
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            assert sample("db_pool_checked_out", pool="overflow") == 2
+            assert sample("db_pool_overflow", pool="overflow") == 1
+        assert sample("db_pool_checked_out", pool="overflow") == 0
+        assert sample("db_pool_overflow", pool="overflow") == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_gauges_follow_invalidation_detach_and_dispose(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=2)
+    instrument_pool(engine, "events")
+    pool = engine.sync_engine.pool
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            # Invalidating closes the connection and checks it in.
+            await first.invalidate()
+            assert sample("db_pool_checked_out", pool="events") == pool.checkedout() == 1
+            assert sample("db_pool_overflow", pool="events") == 0
+        assert sample("db_pool_checked_out", pool="events") == pool.checkedout() == 0
+        assert sample("db_pool_overflow", pool="events") == max(pool.overflow(), 0) == 0
+
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            raw.detach()
+            assert sample("db_pool_checked_out", pool="events") == 0
+        raw.close()
+        assert sample("db_pool_checked_out", pool="events") == 0
+
+        # Connections out while the pool is swapped are still checked in.
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await engine.dispose()
+            assert sample("db_pool_checked_out", pool="events") == 1
+        assert sample("db_pool_checked_out", pool="events") == 0
+        assert sample("db_pool_overflow", pool="events") == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_cache_events_are_counted(db_session, client):
+    author = Author(name="Metrics Cache Author")
+    db_session.add(author)
+    await db_session.commit()
+    book = Book(title="Metrics Cache Book", genre="Fiction", published_year=2001, author_id=author.id)
+    db_session.add(book)
+    await db_session.commit()
+    hits = sample("cache_events_total", cache="books", event="hit")
+    misses = sample("cache_events_total", cache="books", event="miss")
+
+    await client.get(f"/books/{book.id}")
+    await client.get(f"/books/{book.id}")
+
+    assert sample("cache_events_total", cache="books", event="miss") == misses + 1
+    assert sample("cache_events_total", cache="books", event="hit") == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_statement_shapes_are_counted(client):
+    shape = "books.list:sqlite:genre+year_to:id_asc:page"
+    before = sample("db_statement_executions_total", shape=shape)
+
+    await client.get("/books/", params={"genre": "History", "year_to": 1000})
+    await client.get("/books/", params={"genre": "Science", "year_to": 1001})
+
+    assert sample("db_statement_executions_total", shape=shape) == before + 2
+    r = await client.get("/metrics")
+    assert f'db_statement_executions_total{{shape="{shape}"}}' in r.text
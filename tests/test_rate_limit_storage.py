@@ -0,0 +1,103 @@
+import multiprocessing
+
+import pytest
+from limits import parse
+from limits.errors import ConfigurationError
+from limits.storage import storage_from_string
+from limits.strategies import (
+    FixedWindowRateLimiter,
+    SlidingWindowCounterRateLimiter,
+)
+
+from src.core.rate_limit_storage import SQLiteStorage
+
+
+@pytest.fixture
+def storage_uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'limits.db'}"
+
+
+def _hit_from_process(uri, hits, queue):
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    item = parse("10/minute")
+    queue.put(sum(limiter.hit(item, "shared") for _ in range(hits)))
+
+
+def test_storage_from_uri(storage_uri):
+    storage = storage_from_string(storage_uri)
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.check()
+
+
+def test_storage_needs_a_file():
+    with pytest.raises(ConfigurationError):
+        storage_from_string("sqlite://")
+    with pytest.raises(ConfigurationError):
+        storage_from_string("sqlite:///:memory:")
+
+
+def test_incr_get_and_clear(storage_uri):
+    storage = storage_from_string(storage_uri)
+
+    assert storage.incr("key", 60) == 1
+    assert storage.incr("key", 60, amount=2) == 3
+    assert storage.get("key") == 3
+    assert storage.get_expiry("key") > 0
+    assert storage.decr("key") == 2
+
+    storage.clear("key")
+    assert storage.get("key") == 0
+    assert storage.incr("key", 60) == 1
+    assert storage.reset() == 1
+
+
+def test_counter_restarts_after_expiry(storage_uri, monkeypatch):
+    storage = storage_from_string(storage_uri)
+    now = [1000.0]
+    monkeypatch.setattr("src.core.rate_limit_storage.time.time", lambda: now[0])
+
+    storage.incr("key", 10)
+    storage.incr("key", 10)
+    now[0] += 11
+
+    assert storage.get("key") == 0
+    assert storage.incr("key", 10) == 1
+
+
+def test_fixed_window_is_shared_between_instances(storage_uri):
+    item = parse("3/minute")
+    first = FixedWindowRateLimiter(storage_from_string(storage_uri))
+    second = FixedWindowRateLimiter(storage_from_string(storage_uri))
+
+    assert first.hit(item, "client")
+    assert second.hit(item, "client")
+    assert first.hit(item, "client")
+    assert not second.hit(item, "client")
+    assert second.hit(item, "other-client")
+
+
+def test_sliding_window_counter(storage_uri):
+    item = parse("2/minute")
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(storage_uri))
+
+    assert limiter.hit(item, "client")
+    assert limiter.hit(item, "client")
+    assert not limiter.hit(item, "client")
+    assert not limiter.test(item, "client")
+    assert limiter.get_window_stats(item, "client").remaining == 0
+
+    limiter.clear(item, "client")
+    assert limiter.hit(item, "client")
+
+
+def test_limit_is_shared_between_processes(storage_uri):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=_hit_from_process, args=(storage_uri, 5, queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    allowed = sum(queue.get(timeout=60) for _ in workers)
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert allowed == 10
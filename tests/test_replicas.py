@@ -0,0 +1,169 @@
+import time
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.db import database, replicas
+from src.db.database import get_read_db
+from src.db.instrumentation import instrument_engine, track_queries
+from src.db.models import Author, Base, Book
+from src.db.replicas import READ_PRIMARY_COOKIE, ReadRouter, ReadYourWritesMiddleware, Replica, wants_primary
+from src.main import app
+from tests.conftest import TestSessionLocal
+
+
+def _replica(name, url):
+    engine = create_async_engine(url)
+    return Replica(name, engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+
+
+@pytest.mark.asyncio
+async def test_replicas_take_turns_and_fall_back_to_primary(tmp_path):
+    first = _replica("replica1", f"sqlite+aiosqlite:///{tmp_path}/one.db")
+    second = _replica("replica2", f"sqlite+aiosqlite:///{tmp_path}/two.db")
+    router = ReadRouter(TestSessionLocal, [first, second])
+    try:
+        assert [router.sessions() for _ in range(4)] == [first.sessions, second.sessions] * 2
+        assert router.sessions(prefer_primary=True) is TestSessionLocal
+
+        second.healthy = False
+        assert {router.sessions() for _ in range(4)} == {first.sessions}
+        first.healthy = False
+        assert router.sessions() is TestSessionLocal
+
+        # A passing check puts a replica back in rotation.
+        await router.check_all()
+        assert first.healthy and second.healthy
+    finally:
+        await router.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_health_check_takes_replica_out(tmp_path):
+    broken = _replica("replica1", f"sqlite+aiosqlite:///{tmp_path}/missing/dir.db")
+    router = ReadRouter(TestSessionLocal, [broken])
+    try:
+        assert await router.check(broken) is False
+        assert not broken.healthy
+        assert router.sessions() is TestSessionLocal
+    finally:
+        await router.dispose()
+
+
+def test_wants_primary():
+    now = time.time()
+    assert wants_primary(f"{READ_PRIMARY_COOKIE}={now + 2}", window=5)
+    assert not wants_primary(f"{READ_PRIMARY_COOKIE}={now - 1}", window=5)
+    # A deadline beyond the window was not set by us.
+    assert not wants_primary(f"{READ_PRIMARY_COOKIE}={now + 3600}", window=5)
+    assert not wants_primary(f"{READ_PRIMARY_COOKIE}=soon", window=5)
+    assert not wants_primary("other=1", window=5)
+    assert not wants_primary(None, window=5)
+
+
+@pytest.mark.asyncio
+async def test_writes_set_read_your_writes_cookie(db_session, client: AsyncClient):
+    author = Author(name="Cookie Author")
+    db_session.add(author)
+    await db_session.commit()
+
+    wrapped = ReadYourWritesMiddleware(app, window=5, read_only_paths={"/books/batch"})
+    async with AsyncClient(transport=ASGITransport(app=wrapped), base_url="http://test") as ac:
+        payload = {"title": "Cookie Book", "genre": "Fiction", "published_year": 2001, "author_id": author.id}
+        r = await ac.post("/books/", json=payload)
+        assert r.status_code == 200
+        assert wants_primary(f"{READ_PRIMARY_COOKIE}={r.cookies[READ_PRIMARY_COOKIE]}", window=5)
+
+        assert READ_PRIMARY_COOKIE not in (await ac.get("/books/")).cookies
+        assert READ_PRIMARY_COOKIE not in (await ac.post("/books/", json={**payload, "author_id": 999999})).cookies
+        assert READ_PRIMARY_COOKIE not in (await ac.post("/books/batch", json={"ids": [1]})).cookies
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_client_writes(tmp_path, monkeypatch, client: AsyncClient):
+    replica = _replica("replica1", f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    async with replica.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with replica.sessions() as session:
+        author = Author(name="Replica Author")
+        session.add(author)
+        await session.commit()
+        session.add(Book(title="Replica Only Book", genre="Fiction", published_year=2001, author_id=author.id))
+        await session.commit()
+
+    monkeypatch.setattr(database, "read_router", ReadRouter(TestSessionLocal, [replica]))
+    app.dependency_overrides.pop(get_read_db)
+    try:
+        params = {"title": "Replica Only"}
+        r = await client.get("/books/", params=params)
+        assert [b["title"] for b in r.json()] == ["Replica Only Book"]
+
+        cookie = {"cookie": f"{READ_PRIMARY_COOKIE}={time.time() + 2}"}
+        r = await client.get("/books/", params=params, headers=cookie)
+        assert r.json() == []
+    finally:
+        await replica.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_right_after_a_write_do_not_fill_the_cache(tmp_path, monkeypatch, db_session, client: AsyncClient):
+    author = Author(name="Lagging Author")
+    db_session.add(author)
+    await db_session.commit()
+    # The replica has not replayed the books yet.
+    replica = _replica("replica1", f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    async with replica.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    monkeypatch.setattr(database, "read_router", ReadRouter(TestSessionLocal, [replica]))
+    app.dependency_overrides.pop(get_read_db)
+    try:
+        payload = {"title": "Lagging Book", "genre": "Fiction", "published_year": 2001, "author_id": author.id}
+        assert (await client.post("/books/", json=payload)).status_code == 200
+
+        params = {"title": "Lagging Book"}
+        # Another client reads the old state from the replica ...
+        assert (await client.get("/books/", params=params)).json() == []
+        # ... which must not be cached for the writer, inside its window.
+        cookie = {"cookie": f"{READ_PRIMARY_COOKIE}={time.time() + 2}"}
+        r = await client.get("/books/", params=params, headers=cookie)
+        assert [b["title"] for b in r.json()] == ["Lagging Book"]
+        # Pages read from the primary are cached for everyone.
+        r = await client.get("/books/", params=params)
+        assert [b["title"] for b in r.json()] == ["Lagging Book"]
+    finally:
+        await replica.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_fill_the_cache(tmp_path, monkeypatch, client: AsyncClient):
+    replica = _replica("replica1", f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    instrument_engine(replica.engine)
+    async with replica.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with replica.sessions() as session:
+        author = Author(name="Cached Replica Author")
+        session.add(author)
+        await session.commit()
+        session.add(Book(title="Cached Replica Book", genre="Fiction", published_year=2001, author_id=author.id))
+        await session.commit()
+
+    monkeypatch.setattr(database, "read_router", ReadRouter(TestSessionLocal, [replica]))
+    # No write by this worker within the replica lag bound.
+    monkeypatch.setattr(replicas, "_last_write", float("-inf"))
+    app.dependency_overrides.pop(get_read_db)
+    try:
+        params = {"title": "Cached Replica"}
+        r = await client.get("/books/", params=params)
+        assert [b["title"] for b in r.json()] == ["Cached Replica Book"]
+
+        async with replica.engine.begin() as conn:
+            await conn.exec_driver_sql("DELETE FROM books")
+        with track_queries() as stats:
+            r = await client.get("/books/", params=params)
+        assert [b["title"] for b in r.json()] == ["Cached Replica Book"]
+        assert stats.count == 0
+    finally:
+        await replica.engine.dispose()
@@ -1,5 +1,17 @@
+import asyncio
+from datetime import timedelta
+
 import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import text
+from src.auth import jwt_handler
+from src.auth.dependencies import get_current_user
+from src.core.cache import InMemoryLRUCache
 from src.crud import user as user_crud
+from src.crud import tokens
+from src.crud.tokens import RevocationList, revoke_token
+from src.db.instrumentation import track_queries
 from src.schemas.user import UserCreate
 
 
@@ -111,3 +123,224 @@ async def test_get_current_user_with_access_token(client):
 
     resp = await client.get("/users/register", headers={"Authorization": f"Bearer {token}"})
     assert resp.status_code in [400, 405]
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify_password():
+    hashed = await user_crud.hash_password_async("mypassword")
+
+    assert await user_crud.verify_and_update_password("mypassword", hashed) == (True, None)
+    assert await user_crud.verify_and_update_password("wrong", hashed) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    task = asyncio.create_task(ticker())
+    try:
+        await asyncio.gather(*(user_crud.hash_password_async("pw") for _ in range(4)))
+    finally:
+        task.cancel()
+    assert ticks > 10
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_when_rounds_change(client, db_session, monkeypatch):
+    monkeypatch.setattr(user_crud, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4))
+    await client.post("/users/register", json={
+        "email": "rehash@example.com",
+        "password": "password123"
+    })
+    user = await user_crud.get_user_by_email(db_session, "rehash@example.com")
+    assert user.hashed_password.startswith("$2b$04$")
+
+    monkeypatch.setattr(user_crud, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+    resp = await client.post("/users/login", json={
+        "email": "rehash@example.com",
+        "password": "password123"
+    })
+    assert resp.status_code == 200
+
+    await db_session.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+    assert user_crud.verify_password("password123", user.hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_login_wrong_password_keeps_hash(client, db_session, monkeypatch):
+    monkeypatch.setattr(user_crud, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4))
+    await client.post("/users/register", json={
+        "email": "norehash@example.com",
+        "password": "password123"
+    })
+    user = await user_crud.get_user_by_email(db_session, "norehash@example.com")
+    original = user.hashed_password
+
+    monkeypatch.setattr(user_crud, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+    resp = await client.post("/users/login", json={
+        "email": "norehash@example.com",
+        "password": "wrong"
+    })
+    assert resp.status_code == 401
+
+    await db_session.refresh(user)
+    assert user.hashed_password == original
+
+
+def _count_jwt_decodes(monkeypatch):
+    calls = []
+    real_decode = jwt_handler.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_handler.jwt, "decode", counting_decode)
+    return calls
+
+
+def test_decode_token_caches_verified_payload(monkeypatch):
+    calls = _count_jwt_decodes(monkeypatch)
+    token = jwt_handler.create_access_token({"sub": "cache@example.com"})
+
+    first = jwt_handler.decode_token(token)
+    first["sub"] = "mutated"
+    second = jwt_handler.decode_token(token)
+
+    assert second["sub"] == "cache@example.com"
+    assert len(calls) == 1
+
+
+def test_token_cache_entry_expires_with_token(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(jwt_handler, "token_cache", InMemoryLRUCache(ttl=None, clock=lambda: now[0]))
+    calls = _count_jwt_decodes(monkeypatch)
+    token = jwt_handler.create_access_token({"sub": "ttl@example.com"}, expires_delta=timedelta(seconds=60))
+
+    jwt_handler.decode_token(token)
+    now[0] = 30
+    jwt_handler.decode_token(token)
+    assert len(calls) == 1
+
+    now[0] = 61
+    jwt_handler.decode_token(token)
+    assert len(calls) == 2
+
+
+def test_cached_access_token_is_not_a_refresh_token():
+    token = jwt_handler.create_access_token({"sub": "scope@example.com"})
+    jwt_handler.decode_token(token)
+
+    with pytest.raises(HTTPException) as exc:
+        jwt_handler.decode_token(token, refresh=True)
+    assert exc.value.detail == "Invalid refresh token"
+
+
+def test_invalid_token_is_not_cached():
+    with pytest.raises(HTTPException):
+        jwt_handler.decode_token("not-a-token")
+    assert jwt_handler.token_cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_revoke_token(db_session):
+    token = jwt_handler.create_access_token({"sub": "revoke@example.com"})
+    other = jwt_handler.create_access_token({"sub": "revoke@example.com"})
+    assert token != other
+    jwt_handler.decode_token(token)
+
+    await revoke_token(db_session, token)
+    # Another worker has nothing cached and only shares the database.
+    jwt_handler.clear_token_cache()
+    tokens.revocations.clear()
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token, db_session)
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Token has been revoked"
+    assert (await get_current_user(other, db_session))["sub"] == "revoke@example.com"
+
+
+@pytest.mark.asyncio
+async def test_revocations_are_never_evicted_before_expiry(db_session, monkeypatch):
+    monkeypatch.setattr(jwt_handler.token_cache, "maxsize", 1)
+    tokens = [jwt_handler.create_access_token({"sub": f"many{i}@example.com"}) for i in range(5)]
+    for token in tokens:
+        await revoke_token(db_session, token)
+    for token in tokens:
+        with pytest.raises(HTTPException):
+            await get_current_user(token, db_session)
+
+
+@pytest.mark.asyncio
+async def test_revocation_check_runs_no_query_per_request(db_session):
+    token = jwt_handler.create_access_token({"sub": "hot@example.com"})
+    await get_current_user(token, db_session)
+
+    with track_queries() as stats:
+        for _ in range(5):
+            await get_current_user(token, db_session)
+    assert stats.count == 0
+
+
+@pytest.mark.asyncio
+async def test_revocation_by_another_worker_is_seen_after_sync(db_session, monkeypatch):
+    now = [0.0]
+    here = RevocationList(interval=1.0, clock=lambda: now[0])
+    monkeypatch.setattr(tokens, "revocations", here)
+    token = jwt_handler.create_access_token({"sub": "sync@example.com"})
+    await get_current_user(token, db_session)
+
+    # Revoked through another worker: only the shared table changes.
+    monkeypatch.setattr(tokens, "revocations", RevocationList())
+    await revoke_token(db_session, token)
+    monkeypatch.setattr(tokens, "revocations", here)
+
+    now[0] = 0.5
+    assert (await get_current_user(token, db_session))["sub"] == "sync@example.com"
+    now[0] = 1.0
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token, db_session)
+    assert exc.value.detail == "Token has been revoked"
+
+
+@pytest.mark.asyncio
+async def test_expired_revocations_are_purged(db_session):
+    await db_session.execute(text("INSERT INTO revoked_tokens (jti, expires_at, revoked_at) VALUES ('long-gone', 1, 0)"))
+    await db_session.commit()
+    await revoke_token(db_session, jwt_handler.create_access_token({"sub": "purge@example.com"}))
+    result = await db_session.execute(text("SELECT COUNT(*) FROM revoked_tokens WHERE jti = 'long-gone'"))
+    assert result.scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_tokens(db_session, client):
+    await client.post("/users/register", json={
+        "email": "logout@example.com",
+        "password": "password123"
+    })
+    login_resp = await client.post("/users/login", json={
+        "email": "logout@example.com",
+        "password": "password123"
+    })
+    tokens = login_resp.json()
+
+    resp = await client.post(
+        "/users/logout",
+        params={"refresh_token": tokens["refresh_token"]},
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert resp.status_code == 200
+
+    resp = await client.post("/users/refresh", params={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+    assert resp.json()["detail"] == "Token has been revoked"
+    with pytest.raises(HTTPException):
+        await get_current_user(tokens["access_token"], db_session)